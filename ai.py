@@ -14,6 +14,12 @@ class AI(player.Player):
 	'''
 	def __init__(self, theBoard, theBag, theDifficulty = 10, theHeuristic = None):
 		player.Player.__init__(self, "Wordsmith", theBoard, theBag, theDifficulty, theHeuristic)
+		
+	'''
+	The AI weighs exchanging on its own turns (see Player.exchangesTiles)
+	'''
+	def exchangesTiles(self):
+		return player.Player.EXCHANGE_SEARCH
 	
 
 		
\ No newline at end of file
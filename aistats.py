@@ -8,6 +8,12 @@ from pygame.locals import *
 class AIStats():
 	
 	FILENAME = "media/aistats.txt"  #'media/heuristic/heuristic_tilequantile_5_5.txt'
+	SLOT_VALUES_FILENAME = "media/slotvalues.txt"	#the table fitted by fitSlotValues, used to order tile slots
+	ANCHOR_VALUES_FILENAME = "media/anchorvalues.txt"	#the table fitted by fitAnchorValues, used to order anchors
+	ANCHOR_PRIOR = 50				#moves' worth of weight pulling each anchor value towards 0
+	LEAVE_VALUES_FILENAME = "media/leavevalues.txt"	#the table fitted by fitLeaveValues, used to value exchanges
+	LEAVE_KINDS = ["length", "tile", "duplicates", "balance"]	#what a leave is valued by, see leaveKeys
+	LEAVE_PRIOR = 20				#leaves' worth of weight pulling each fitted leave value towards 0
 	COLLECT_WORD_DATA = False		#if True, this will collect data on timing/letterPlays
 	COLLECT_GAME_DATA = False		#if True, this will record data for entire games
 	
@@ -23,6 +29,9 @@ class AIStats():
 		self.scores = []
 		
 		self.seedRatio = []
+		self.slotPlays = []
+		self.anchorPlays = []
+		self.leavePlays = []
 		
 		self.load()
 	
@@ -60,6 +69,24 @@ class AIStats():
 						tokens = line.split()
 						self.scores.append([int(token) for token in tokens])
 						
+					elif MODE == "SLOTS:":
+						tokens = line.split()
+						#SLOTS should be [numEmpty] [wordBonuses] [letterBonuses] [crossWords] [throughTiles] [points]
+						assert len(tokens) == 6
+						self.slotPlays.append((tuple([int(token) for token in tokens[:5]]), float(tokens[5])))
+						
+					elif MODE == "ANCHORS:":
+						tokens = line.split()
+						#ANCHORS should be [the five slot features] [best points] [moves generated]
+						assert len(tokens) == 7
+						self.anchorPlays.append((tuple([int(token) for token in tokens[:5]]), float(tokens[5]), int(tokens[6])))
+						
+					elif MODE == "LEAVES:":
+						tokens = line.split()
+						#LEAVES should be [letters kept, '-' for none] [points of the next turn]
+						assert len(tokens) == 2
+						self.leavePlays.append((tokens[0].strip('-'), float(tokens[1])))
+						
 						
 
 				else:
@@ -73,6 +100,12 @@ class AIStats():
 					MODE = "SEED:"
 				elif line == "GAME:":
 					MODE = "GAME:"
+				elif line == "SLOTS:":
+					MODE = "SLOTS:"
+				elif line == "ANCHORS:":
+					MODE = "ANCHORS:"
+				elif line == "LEAVES:":
+					MODE = "LEAVES:"
 					
 		except IOError as e:
 			pass
@@ -111,6 +144,24 @@ class AIStats():
 			statsFile.write("\n")
 		statsFile.write("\n")		
 		
+		if len(self.slotPlays) > 0:
+			statsFile.write("SLOTS:\n")
+			for (features, points) in self.slotPlays:
+				statsFile.write(" ".join([str(feature) for feature in features])+" "+str(points)+"\n")
+			statsFile.write("\n")
+			
+		if len(self.anchorPlays) > 0:
+			statsFile.write("ANCHORS:\n")
+			for (features, points, numMoves) in self.anchorPlays:
+				statsFile.write(" ".join([str(feature) for feature in features])+" "+str(points)+" "+str(numMoves)+"\n")
+			statsFile.write("\n")
+			
+		if len(self.leavePlays) > 0:
+			statsFile.write("LEAVES:\n")
+			for (leave, points) in self.leavePlays:
+				statsFile.write((leave or '-')+" "+str(points)+"\n")
+			statsFile.write("\n")
+		
 			
 	def updateTiming(self, totalTime, timeAtMaxWord):
 		if AIStats.COLLECT_WORD_DATA:
@@ -125,10 +176,191 @@ class AIStats():
 		if AIStats.COLLECT_WORD_DATA:
 			self.seedRatio.append((numSeeds, numTiles, points))
 				
+	def updateSlotPlay(self, features, points):
+		if AIStats.COLLECT_WORD_DATA:
+			self.slotPlays.append((features, points))
+				
+	def updateAnchorPlay(self, features, points, numMoves):
+		if AIStats.COLLECT_WORD_DATA:
+			self.anchorPlays.append((features, points, numMoves))
+				
+	def updateLeavePlay(self, leave, points):
+		if AIStats.COLLECT_WORD_DATA:
+			self.leavePlays.append((leave, points))
+				
 	def saveGame(self, gameScores):
 		if AIStats.COLLECT_GAME_DATA:
 			self.scores.append(gameScores)
 	
+	'''
+	Fits the table of expected points per tile slot features (see Player.slotFeatures) to the
+	best points found in every slot searched, and writes it to SLOT_VALUES_FILENAME as lines of
+	[features] [mean points] [number of slots]
+	'''
+	def fitSlotValues(self):
+		totals = {}
+		counts = {}
+		for (features, points) in self.slotPlays:
+			totals[features] = totals.get(features, 0.0) + points
+			counts[features] = counts.get(features, 0) + 1
+			
+		valuesFile = open(AIStats.SLOT_VALUES_FILENAME, 'w')
+		for features in sorted(totals.keys()):
+			mean = totals[features] / counts[features]
+			valuesFile.write(" ".join([str(feature) for feature in features])+" "+str(round(mean, 3))+" "+str(counts[features])+"\n")
+		valuesFile.close()
+		
+	'''
+	Loads the table written by fitSlotValues as a dict of features -> expected points. Each number
+	of empty squares (the first feature) is also mapped to the mean over all of its slots, for
+	slots whose features weren't seen. Empty if there's no table
+	'''
+	@staticmethod
+	def loadSlotValues():
+		slotValues = {}
+		totals = {}
+		counts = {}
+		try:
+			valuesFile = open(AIStats.SLOT_VALUES_FILENAME, 'r')
+			for line in valuesFile:
+				tokens = line.split()
+				if len(tokens) == 0:
+					continue
+				assert len(tokens) == 7
+				features = tuple([int(token) for token in tokens[:5]])
+				(mean, count) = (float(tokens[5]), int(tokens[6]))
+				slotValues[features] = mean
+				totals[features[0]] = totals.get(features[0], 0.0) + mean * count
+				counts[features[0]] = counts.get(features[0], 0) + count
+		except IOError as e:
+			pass
+			
+		for numEmpty in totals.keys():
+			slotValues[numEmpty] = totals[numEmpty] / counts[numEmpty]
+		return slotValues
+		
+	'''
+	Fits the table of best points and moves generated per anchor features (see
+	Player.anchorFeatures) to every anchor searched, and writes it to ANCHOR_VALUES_FILENAME as
+	lines of [features] [mean best points] [mean moves] [number of anchors]
+	'''
+	def fitAnchorValues(self):
+		totalPoints = {}
+		totalMoves = {}
+		counts = {}
+		for (features, points, numMoves) in self.anchorPlays:
+			totalPoints[features] = totalPoints.get(features, 0.0) + points
+			totalMoves[features] = totalMoves.get(features, 0) + numMoves
+			counts[features] = counts.get(features, 0) + 1
+			
+		valuesFile = open(AIStats.ANCHOR_VALUES_FILENAME, 'w')
+		for features in sorted(counts.keys()):
+			meanPoints = totalPoints[features] / counts[features]
+			meanMoves = 1.0 * totalMoves[features] / counts[features]
+			valuesFile.write(" ".join([str(feature) for feature in features])+" "+str(round(meanPoints, 3))+" "+
+							 str(round(meanMoves, 3))+" "+str(counts[features])+"\n")
+		valuesFile.close()
+		
+	'''
+	Loads the table written by fitAnchorValues as a dict of features -> best points expected per
+	move generated, with ANCHOR_PRIOR more moves of no points so anchors seldom seen don't get
+	extreme values. As with the slot values, each number of empty squares is also mapped to its
+	value over all of its anchors. Empty if there's no table
+	'''
+	@staticmethod
+	def loadAnchorValues():
+		anchorValues = {}
+		totalPoints = {}
+		totalMoves = {}
+		try:
+			valuesFile = open(AIStats.ANCHOR_VALUES_FILENAME, 'r')
+			for line in valuesFile:
+				tokens = line.split()
+				if len(tokens) == 0:
+					continue
+				assert len(tokens) == 8
+				features = tuple([int(token) for token in tokens[:5]])
+				(meanPoints, meanMoves, count) = (float(tokens[5]), float(tokens[6]), int(tokens[7]))
+				anchorValues[features] = meanPoints * count / (meanMoves * count + AIStats.ANCHOR_PRIOR)
+				totalPoints[features[0]] = totalPoints.get(features[0], 0.0) + meanPoints * count
+				totalMoves[features[0]] = totalMoves.get(features[0], 0.0) + meanMoves * count
+		except IOError as e:
+			pass
+			
+		for numEmpty in totalPoints.keys():
+			anchorValues[numEmpty] = totalPoints[numEmpty] / (totalMoves[numEmpty] + AIStats.ANCHOR_PRIOR)
+		return anchorValues
+		
+	'''
+	Fits the table of leave values (see Player.leaveValue) to the points scored the turn after
+	every leave, and writes it to LEAVE_VALUES_FILENAME as lines of [kind] [key] [value] [count].
+	Each kind of LEAVE_KINDS is fitted in turn to what the ones before it left unexplained, as
+	the mean over the leaves of each key, with LEAVE_PRIOR more leaves of 0 so keys seldom seen
+	don't get extreme values. A leave has one key of each kind, except for tiles: it has one per
+	tile kept, which share its residual
+	'''
+	def fitLeaveValues(self):
+		mean = sum([points for (leave, points) in self.leavePlays]) / len(self.leavePlays)
+		residuals = [points - mean for (leave, points) in self.leavePlays]
+		
+		valuesFile = open(AIStats.LEAVE_VALUES_FILENAME, 'w')
+		for kind in AIStats.LEAVE_KINDS:
+			totals = {}
+			counts = {}
+			for i in range(len(self.leavePlays)):
+				keys = AIStats.leaveKeys(kind, self.leavePlays[i][0])
+				for key in keys:
+					totals[key] = totals.get(key, 0.0) + residuals[i] / len(keys)
+					counts[key] = counts.get(key, 0) + 1
+					
+			values = {}
+			for key in totals.keys():
+				values[key] = totals[key] / (counts[key] + AIStats.LEAVE_PRIOR)
+			for i in range(len(self.leavePlays)):
+				for key in AIStats.leaveKeys(kind, self.leavePlays[i][0]):
+					residuals[i] -= values[key]
+					
+			for key in sorted(values.keys()):
+				valuesFile.write(" ".join([str(part) for part in key])+" "+str(round(values[key], 3))+" "+str(counts[key])+"\n")
+		valuesFile.close()
+		
+	'''
+	Returns the keys of the given kind (one of LEAVE_KINDS) of a leave, given as its letters with
+	'_' for a blank
+	'''
+	@staticmethod
+	def leaveKeys(kind, leave):
+		if kind == "length":
+			return [("length", len(leave))]
+		elif kind == "tile":
+			return [("tile", letter) for letter in leave]
+		elif kind == "duplicates":
+			return [("duplicates", len(leave) - len(set(leave)))]
+		else:
+			vowels = len([letter for letter in leave if letter in "AEIOU"])
+			return [("balance", vowels, len(leave) - vowels - leave.count('_'))]
+		
+	'''
+	Loads the table written by fitLeaveValues as a dict of (kind, key...) -> value, e.g.
+	("tile", "S") or ("balance", 2, 3). Empty if there's no table
+	'''
+	@staticmethod
+	def loadLeaveValues():
+		leaveValues = {}
+		try:
+			valuesFile = open(AIStats.LEAVE_VALUES_FILENAME, 'r')
+			for line in valuesFile:
+				tokens = line.split()
+				if len(tokens) == 0:
+					continue
+				key = [tokens[0]]
+				for token in tokens[1:-2]:
+					key.append(token if tokens[0] == "tile" else int(token))
+				leaveValues[tuple(key)] = float(tokens[-2])
+		except IOError as e:
+			pass
+		return leaveValues
+	
 	'''
 	Displays a histogram of the ratio of timeAtMaxWord over totalTime
 	'''	
@@ -352,9 +584,9 @@ class AIStats():
 	'''	
 	def visualizeWordUsage(self, DISPLAYSURF):
 		
-		dictionary = dictionarywords.DictionaryWords("media/scrabblewords_usage.txt")
+		dictionary = dictionarywords.DictionaryWords.shared("media/scrabblewords_usage.txt")
 		
-		values = dictionary.words.values()
+		values = list(dictionary.usages)
 		maxUsage = math.log(max(values))
 					
 		print "Most used word appeared "+str(maxUsage)+" times in Google's ngram corpus."
@@ -370,20 +602,16 @@ class AIStats():
 		self.drawHistogram(DISPLAYSURF, normalizedValues, 400, 400, 10)		
 	
 	'''
-	Gives the quantiles of word usages
+	Gives the quantiles of word usages, from the quantile table of the compiled lexicon
 	'''	
 	def wordUsageQuantiles(self, quantiles):
-		dictionary = dictionarywords.DictionaryWords("media/scrabblewords_usage.txt")
+		dictionary = dictionarywords.DictionaryWords.shared("media/scrabblewords_usage.txt")
 		
-		values = dictionary.words.values()
-		values.sort(reverse=True)
 		for quantile in quantiles:
 			
-			massCutoff = int(quantile * len(values))
-			
-			assert massCutoff < len(values)
+			assert quantile >= 0.0 and quantile <= 1.0
 			
-			point = values[massCutoff]
+			point = dictionary.usageQuantile(quantile)
 			if point <= 1:
 				point = 1
 			
@@ -474,6 +702,18 @@ if __name__ == '__main__':
 	
 	print str(len(aiStats.scores))+" games played in this round of testing.\n"
 	
+	if len(aiStats.slotPlays) > 0:
+		aiStats.fitSlotValues()
+		print "Slot values fitted to "+str(len(aiStats.slotPlays))+" slots, saved to "+AIStats.SLOT_VALUES_FILENAME
+		
+	if len(aiStats.anchorPlays) > 0:
+		aiStats.fitAnchorValues()
+		print "Anchor values fitted to "+str(len(aiStats.anchorPlays))+" anchors, saved to "+AIStats.ANCHOR_VALUES_FILENAME
+		
+	if len(aiStats.leavePlays) > 0:
+		aiStats.fitLeaveValues()
+		print "Leave values fitted to "+str(len(aiStats.leavePlays))+" leaves, saved to "+AIStats.LEAVE_VALUES_FILENAME
+	
 	#for i in range(0, 20, 1):
 	#	print str(100*aiStats.timingCDF(i)) + '% would be completed successfully in '+ str(i) +' seconds'
 		
@@ -8,38 +8,20 @@ import pygame, random, tile
 
 class Bag:
 	
+	#the initial distribution of tiles, as (letter, points, count), ' ' being a blank
+	DISTRIBUTION = [('A', 1, 9), ('B', 3, 2), ('C', 3, 2), ('D', 2, 4), ('E', 1, 12), ('F', 4, 2),
+					('G', 2, 3), ('H', 4, 2), ('I', 1, 9), ('J', 8, 1), ('K', 5, 1), ('L', 1, 4),
+					('M', 3, 2), ('N', 1, 6), ('O', 1, 8), ('P', 3, 2), ('Q', 10, 1), ('R', 1, 6),
+					('S', 1, 4), ('T', 1, 6), ('U', 1, 4), ('V', 4, 2), ('W', 4, 2), ('X', 8, 1),
+					('Y', 4, 4), ('Z', 10, 1), (' ', 0, 2)]
+	
 	#sets up the initial distribution of tiles
 	def __init__(self):
 		self.tiles = []
 		
 		#Add the initial distribution of tiles
-		self.add('A', 1, 9)
-		self.add('B', 3, 2)
-		self.add('C', 3, 2)
-		self.add('D', 2, 4)
-		self.add('E', 1, 12)
-		self.add('F', 4, 2)
-		self.add('G', 2, 3)
-		self.add('H', 4, 2)
-		self.add('I', 1, 9)
-		self.add('J', 8, 1)
-		self.add('K', 5, 1)
-		self.add('L', 1, 4)
-		self.add('M', 3, 2)
-		self.add('N', 1, 6)
-		self.add('O', 1, 8)
-		self.add('P', 3, 2)
-		self.add('Q', 10, 1)
-		self.add('R', 1, 6)
-		self.add('S', 1, 4)
-		self.add('T', 1, 6)
-		self.add('U', 1, 4)
-		self.add('V', 4, 2)
-		self.add('W', 4, 2)
-		self.add('X', 8, 1)
-		self.add('Y', 4, 4)
-		self.add('Z', 10, 1)
-		self.add(' ', 0, 2)
+		for (letter, points, count) in Bag.DISTRIBUTION:
+			self.add(letter, points, count)
 		
 		#DEBUG - Small bag for debugging total game states
 		'''self.add('E', 1, 3)
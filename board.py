@@ -1,4 +1,4 @@
-import pygame, tile, player, dictionarywords, wordfrequency, time
+import pygame, tile, player, dictionarywords, wordfrequency, time, random, move
 from pygame.locals import *
 
 class Board:
@@ -13,6 +13,12 @@ class Board:
 	
 	DICTIONARY_FILE = 'media/scrabblewords_usage.txt'
 	
+	ACROSS = 'across'
+	DOWN = 'down'
+	
+	ZOBRIST_SEED = 1234567	#the Zobrist keys are the same in every run, so hashes can be compared
+	ZOBRIST_KEYS = None		#random 64 bit key per square, letter and blank flag, made by initializeZobrist
+	
 	GRID_SIZE = 15 			#size in # of squares
 	START_POSITION = (7, 7)
 	SQUARE_SIZE = tile.Tile.SQUARE_SIZE
@@ -73,12 +79,22 @@ class Board:
 			self.squares[x][y] = (None, Board.DOUBLELETTER)
 		#-----------------------------------------
 		
+		#Zobrist hash of the tiles on the board, the key of each occupied square is kept so the tile
+		#can be hashed out again even if its letter changed (blanks)
+		if Board.ZOBRIST_KEYS == None:
+			Board.initializeZobrist()
+		self.hash = 0
+		self.squareKeys = [[0] * Board.GRID_SIZE for x in range(Board.GRID_SIZE)]
+		
 		#These locks control which row/column can be played upon (so players must play in a straight line)
 		self.columnLock = -1
 		self.rowLock = -1
 		
 		#Load the dictionary
-		self.dictionary = dictionarywords.DictionaryWords(Board.DICTIONARY_FILE)
+		self.dictionary = dictionarywords.DictionaryWords.shared(Board.DICTIONARY_FILE)
+		
+		#Anchor squares and their cross-checks, kept up to date as tiles are locked
+		self.rebuildAnchors()
 		
 		#Load the file keeping track of word usage
 		self.wordfreq = wordfrequency.WordFrequency()
@@ -103,6 +119,7 @@ class Board:
 				previousTile = self.squares[boardX][boardY][0]
 				if previousTile == None:
 					self.squares[boardX][boardY] = (tile, self.squares[boardX][boardY][1])
+					self.hashIn((boardX, boardY), tile)
 					if tile.isBlank:
 						return ("ASK", tile)
 					self.setLocks()
@@ -177,6 +194,7 @@ class Board:
 			tile = self.squares[boardX][boardY][0]
 			if tile != None and not tile.locked:
 				self.squares[boardX][boardY] = (None, self.squares[boardX][boardY][1])
+				self.hashOut((boardX, boardY))
 				self.setLocks()
 				return tile
 		return None
@@ -208,6 +226,84 @@ class Board:
 		assert x >= 0 and y >= 0 and x < Board.GRID_SIZE and y < Board.GRID_SIZE
 		assert self.squares[x][y][0] == None
 		self.squares[x][y] = (tile, self.squares[x][y][1])
+		self.hashIn((x, y), tile)
+		
+	'''
+	Puts the tray tiles of the move (see move.Move) on the board as tentative pieces, giving the
+	blanks their letters, and returns them as ((x, y), tile), or None if the tray doesn't hold them
+	'''
+	def applyMove(self, theMove, tray):
+		placement = theMove.placement(self, tray)
+		if placement == None:
+			return None
+		(tilesPlaced, blanks) = placement
+		
+		i = 0
+		for (pos, tile) in tilesPlaced:
+			if tile.isBlank:
+				tile.letter = blanks[i]
+				i += 1
+			self.setPiece(pos, tile)
+		return tilesPlaced
+		
+	'''
+	Validates and scores the move with the tray's tiles, leaving the board as it was, and returns
+	(score, spellings) as validateWords does, (-1, None) if the tray doesn't hold the tiles
+	'''
+	def validateMove(self, theMove, isFirstTurn, tray, vocabulary = -1):
+		placement = theMove.placement(self, tray)
+		if placement == None:
+			return (-1, None)
+		(tilesPlaced, blanks) = placement
+		
+		#the blanks get their letters back off the board along with the tiles
+		i = 0
+		for (pos, tile) in tilesPlaced:
+			if tile.isBlank:
+				tile.letter = blanks[i]
+				i += 1
+		(score, spellings, seedRatio) = self.validateWords(isFirstTurn, tilesPlayed = tilesPlaced, vocabulary = vocabulary)
+		return (score, spellings)
+		
+	'''
+	Makes the Zobrist keys, one for every square, letter (or ' ' for a blank without one) and
+	blank flag
+	'''
+	@staticmethod
+	def initializeZobrist():
+		generator = random.Random(Board.ZOBRIST_SEED)
+		Board.ZOBRIST_KEYS = {}
+		for x in range(Board.GRID_SIZE):
+			for y in range(Board.GRID_SIZE):
+				for letter in " ABCDEFGHIJKLMNOPQRSTUVWXYZ":
+					for isBlank in (False, True):
+						Board.ZOBRIST_KEYS[(x, y, letter, isBlank)] = generator.getrandbits(64)
+						
+	'''
+	Adds the tile just put on the square to the hash
+	'''
+	def hashIn(self, (x, y), tile):
+		key = Board.ZOBRIST_KEYS[(x, y, tile.letter, tile.isBlank)]
+		self.squareKeys[x][y] = key
+		self.hash ^= key
+		
+	'''
+	Takes the tile just removed from the square out of the hash
+	'''
+	def hashOut(self, (x, y)):
+		self.hash ^= self.squareKeys[x][y]
+		self.squareKeys[x][y] = 0
+		
+	'''
+	Recomputes the hash from scratch, for when the squares were set directly
+	'''
+	def rebuildHash(self):
+		self.hash = 0
+		for x in range(Board.GRID_SIZE):
+			for y in range(Board.GRID_SIZE):
+				self.squareKeys[x][y] = 0
+				if self.squares[x][y][0] != None:
+					self.hashIn((x, y), self.squares[x][y][0])
 		
 	'''
 	This function works by going through all tentative tiles on the board, validating the move
@@ -309,9 +405,12 @@ class Board:
 			return(self.removeTempTiles(), -1)
 			
 
-		#Lock tiles played
+		#Lock tiles played, rehashing them since blanks only got their letters after being put down
 		for (x,y) in inPlay:
 			self.squares[x][y][0].locked = True			
+			self.hashOut((x, y))
+			self.hashIn((x, y), self.squares[x][y][0])
+		self.updateAnchors(inPlay)
 			
 		#Remove the locks on the board
 		self.columnLock = -1
@@ -319,6 +418,84 @@ class Board:
 			
 		return (None, totalScore)
 		
+	'''
+	Rebuilds the anchors (empty squares next to a tile) from scratch, with for each of them and
+	each direction of play:
+		crossChecks - mask of the letters forming a valid perpendicular word there (bit i
+					  for chr(ord('A')+i)), for the full vocabulary
+		crossWords - the (before, after) letters of that perpendicular word
+		crossScores - the points of the tiles already in that perpendicular word
+	Squares without perpendicular neighbours for a direction are left out of its maps
+	'''
+	def rebuildAnchors(self):
+		self.anchors = {}
+		self.crossChecks = {Board.ACROSS: {}, Board.DOWN: {}}
+		self.crossWords = {Board.ACROSS: {}, Board.DOWN: {}}
+		self.crossScores = {Board.ACROSS: {}, Board.DOWN: {}}
+		
+		played = []
+		for x in range(Board.GRID_SIZE):
+			for y in range(Board.GRID_SIZE):
+				if self.squares[x][y][0] != None and self.squares[x][y][0].locked:
+					played.append((x, y))
+		self.updateAnchors(played)
+		
+	'''
+	Updates the anchors and cross-checks after tiles were locked on the given squares. Only the
+	empty squares at either end of the lines of tiles through them can have changed
+	'''
+	def updateAnchors(self, played):
+		for pos in played:
+			if self.anchors.has_key(pos):
+				del self.anchors[pos]
+			for direction in (Board.ACROSS, Board.DOWN):
+				if self.crossChecks[direction].has_key(pos):
+					del self.crossChecks[direction][pos]
+					del self.crossWords[direction][pos]
+					del self.crossScores[direction][pos]
+					
+		for (x, y) in played:
+			for (dx, dy) in ((0, -1), (0, 1), (-1, 0), (1, 0)):
+				xPos, yPos = x+dx, y+dy
+				while (xPos >= 0 and yPos >= 0 and xPos < Board.GRID_SIZE and yPos < Board.GRID_SIZE and
+					   self.squares[xPos][yPos][0] != None):
+					xPos, yPos = xPos+dx, yPos+dy
+				if xPos >= 0 and yPos >= 0 and xPos < Board.GRID_SIZE and yPos < Board.GRID_SIZE:
+					self.anchors[(xPos, yPos)] = True
+					#tiles above or below a square constrain words played across it
+					if dx == 0:
+						self.updateCrossCheck(Board.ACROSS, (xPos, yPos))
+					else:
+						self.updateCrossCheck(Board.DOWN, (xPos, yPos))
+						
+	'''
+	Recomputes the cross-check of an empty square for words played in the given direction
+	'''
+	def updateCrossCheck(self, direction, (x, y)):
+		if direction == Board.ACROSS:
+			(dx, dy) = (0, 1)
+		else:
+			(dx, dy) = (1, 0)
+			
+		points = 0
+		before = ""
+		xPos, yPos = x-dx, y-dy
+		while xPos >= 0 and yPos >= 0 and self.squares[xPos][yPos][0] != None:
+			before = self.squares[xPos][yPos][0].letter + before
+			points += self.squares[xPos][yPos][0].points
+			xPos, yPos = xPos-dx, yPos-dy
+		after = ""
+		xPos, yPos = x+dx, y+dy
+		while xPos < Board.GRID_SIZE and yPos < Board.GRID_SIZE and self.squares[xPos][yPos][0] != None:
+			after += self.squares[xPos][yPos][0].letter
+			points += self.squares[xPos][yPos][0].points
+			xPos, yPos = xPos+dx, yPos+dy
+			
+		if before != "" or after != "":
+			self.crossChecks[direction][(x, y)] = self.dictionary.crossCheck(before, after)
+			self.crossWords[direction][(x, y)] = (before, after)
+			self.crossScores[direction][(x, y)] = points
+			
 	'''
 	Recursively searches through the conflicted word space, trying all permutations
 	to see which assignment of word score bonuses yields the highest points
@@ -556,6 +733,7 @@ class Board:
 				if self.squares[x][y][0].isBlank:
 					self.squares[x][y][0].letter = ' '
 				self.squares[x][y] = (None, self.squares[x][y][1])
+				self.hashOut((x, y))
 					
 	'''
 	Returns a list of all word indices using the given tile
@@ -581,6 +759,7 @@ class Board:
 				if self.squares[x][y][0] != None and not self.squares[x][y][0].locked:
 					inPlay.append(self.squares[x][y][0])
 					self.squares[x][y] = (None, self.squares[x][y][1])
+					self.hashOut((x, y))
 		
 		#Remove the locks the player can play again
 		self.columnLock = -1
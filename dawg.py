@@ -0,0 +1,215 @@
+'''
+A minimized DAWG (directed acyclic word graph) over a sorted list of strings.
+
+The graph is minimized as it is built and is stored in flat arrays rather than as a
+Python object per node: node n owns the edges edgeStart[n] to edgeStart[n+1]-1, whose
+letters are the characters of one edgeLetters string (so finding an edge is a single
+str.find) and whose destinations are in edgeTargets.
+
+Every string also gets a rank (its position in sorted order), which can be computed
+while walking the graph, so per-string data can be kept in a plain array indexed by rank.
+'''
+
+import array
+
+class Dawg:
+
+	'''
+	Builds the DAWG from an iterable of strings, which must be in sorted order. Without
+	strings the DAWG is left empty for useArrays
+	'''
+	def __init__(self, strings = None):
+		if strings != None:
+			self.build(strings)
+			
+	'''
+	Returns the arrays making up the DAWG keyed by name, to be saved in a compiled lexicon file.
+	The prefix is put in front of every name, so several DAWGs can be saved in one file
+	'''
+	def arrays(self, prefix = ''):
+		return {prefix+'edgeStart': self.edgeStart,
+				prefix+'edgeTargets': self.edgeTargets,
+				prefix+'edgeRanks': self.edgeRanks,
+				prefix+'edgeLetters': self.edgeLetters,
+				prefix+'terminal': self.terminal,
+				prefix+'pathCounts': self.pathCounts,
+				prefix+'rootNode': array.array('i', [self.rootNode])}
+				
+	'''
+	Takes over arrays previously returned by arrays() (e.g. loaded from a compiled lexicon file)
+	'''
+	def useArrays(self, arrays, prefix = ''):
+		self.edgeStart = arrays[prefix+'edgeStart']
+		self.edgeTargets = arrays[prefix+'edgeTargets']
+		self.edgeRanks = arrays[prefix+'edgeRanks']
+		self.edgeLetters = arrays[prefix+'edgeLetters']
+		self.terminal = arrays[prefix+'terminal']
+		self.pathCounts = arrays[prefix+'pathCounts']
+		self.rootNode = arrays[prefix+'rootNode'][0]
+
+	'''
+	Returns the root node
+	'''
+	def root(self):
+		return self.rootNode
+
+	'''
+	Returns the index of the edge leaving node with the given letter, -1 if there isn't one
+	'''
+	def edge(self, node, letter):
+		return self.edgeLetters.find(letter, self.edgeStart[node], self.edgeStart[node+1])
+
+	'''
+	Returns the node reached by following letter from node, None if no string continues that way
+	'''
+	def child(self, node, letter):
+		i = self.edgeLetters.find(letter, self.edgeStart[node], self.edgeStart[node+1])
+		if i < 0:
+			return None
+		return self.edgeTargets[i]
+
+	'''
+	Returns a string of all letters leaving the node, in sorted order
+	'''
+	def children(self, node):
+		return self.edgeLetters[self.edgeStart[node]:self.edgeStart[node+1]]
+
+	'''
+	True if a string ends at the node
+	'''
+	def isTerminal(self, node):
+		return self.terminal[node] == 1
+
+	'''
+	Returns the rank of the string (its index in sorted order), -1 if it isn't in the DAWG
+	'''
+	def index(self, string):
+		node = self.rootNode
+		rank = 0
+		for letter in string:
+			i = self.edgeLetters.find(letter, self.edgeStart[node], self.edgeStart[node+1])
+			if i < 0:
+				return -1
+			rank += self.edgeRanks[i]
+			node = self.edgeTargets[i]
+		if self.terminal[node] != 1:
+			return -1
+		return rank
+
+	'''
+	Returns the string with the given rank (the inverse of index)
+	'''
+	def string(self, rank):
+		node = self.rootNode
+		letters = []
+		while not (self.terminal[node] == 1 and rank == 0):
+			#take the last edge whose strings start at or before the rank
+			i = self.edgeStart[node+1]-1
+			while self.edgeRanks[i] > rank:
+				i -= 1
+			rank -= self.edgeRanks[i]
+			letters.append(self.edgeLetters[i])
+			node = self.edgeTargets[i]
+		return "".join(letters)
+
+	'''
+	Returns the number of strings stored
+	'''
+	def size(self):
+		return self.pathCounts[self.rootNode]
+
+	'''
+	Generates every string in sorted order (so the n-th string yielded has rank n)
+	'''
+	def strings(self):
+		stack = [(self.rootNode, "")]
+		while len(stack) > 0:
+			(node, prefix) = stack.pop()
+			if self.terminal[node] == 1:
+				yield prefix
+			#push the edges in reverse, so the smallest letter comes off the stack first
+			for i in range(self.edgeStart[node+1]-1, self.edgeStart[node]-1, -1):
+				stack.append((self.edgeTargets[i], prefix + self.edgeLetters[i]))
+
+	'''
+	Builds the minimized graph. Strings are added in order: each time a string diverges
+	from the previous one, the nodes which can no longer change are replaced by an
+	equivalent node already built, or frozen into the arrays as a new node
+	'''
+	def build(self, strings):
+		self.edgeStart = array.array('i', [0])
+		self.edgeTargets = array.array('i')
+		self.terminal = array.array('b')
+		edgeLetters = []
+		register = {}
+
+		#Nodes still being built are [isTerminal, [letter, ...], [child, ...]], the last child
+		#of each is the next node on the path and isn't frozen yet
+		path = [[False, [], []]]
+		previous = ""
+
+		for current in strings:
+			if current == previous:
+				continue
+
+			#find how much of the string is shared with the previous one
+			common = 0
+			limit = min(len(current), len(previous))
+			while common < limit and current[common] == previous[common]:
+				common += 1
+
+			self.freeze(path, common, register, edgeLetters)
+
+			for letter in current[common:]:
+				node = [False, [], []]
+				path[-1][1].append(letter)
+				path[-1][2].append(node)
+				path.append(node)
+			path[-1][0] = True
+			previous = current
+
+		self.freeze(path, 0, register, edgeLetters)
+		self.rootNode = self.register(path[0], register, edgeLetters)
+		self.edgeLetters = "".join(edgeLetters)
+		self.numberPaths()
+
+	'''
+	Freezes the nodes on the path deeper than depth, replacing each with its registered
+	equivalent
+	'''
+	def freeze(self, path, depth, register, edgeLetters):
+		while len(path) > depth+1:
+			node = path.pop()
+			path[-1][2][-1] = self.register(node, register, edgeLetters)
+
+	'''
+	Returns the index of an existing node equivalent to the given one, or appends it to
+	the arrays as a new node
+	'''
+	def register(self, node, register, edgeLetters):
+		(isTerminal, letters, children) = node
+		signature = (isTerminal, "".join(letters), tuple(children))
+		index = register.get(signature)
+		if index == None:
+			index = len(self.terminal)
+			register[signature] = index
+			self.terminal.append(1 if isTerminal else 0)
+			edgeLetters.extend(letters)
+			self.edgeTargets.extend(children)
+			self.edgeStart.append(len(self.edgeTargets))
+		return index
+
+	'''
+	Counts the strings below every node and, for every edge, how many strings sort before
+	the ones reached through it (the string ending at the node, then the earlier edges).
+	Nodes are frozen after their children, so one pass in index order is enough
+	'''
+	def numberPaths(self):
+		self.pathCounts = array.array('i')
+		self.edgeRanks = array.array('i', [0]) * len(self.edgeTargets)
+		for node in range(len(self.terminal)):
+			count = self.terminal[node]
+			for i in range(self.edgeStart[node], self.edgeStart[node+1]):
+				self.edgeRanks[i] = count
+				count += self.pathCounts[self.edgeTargets[i]]
+			self.pathCounts.append(count)
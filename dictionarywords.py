@@ -1,18 +1,74 @@
 '''
 Words class creates a new word list object which can allow for fast
-data access of words
+data access of words. The words are kept in a minimized DAWG (see dawg.py)
+so that prefixes can be queried as well, and the usage count of each word
+is kept in an array indexed by the word's rank in the DAWG
 '''
 
-import board, time, math
+import board, time, math, array, os, dawg, lexiconfile
 
 class DictionaryWords:
 	
+	COMPILED_EXTENSION = '.lex'
+	COMPILED_VERSION = 4
+	
+	OPEN = '.'		#an open square in a slot pattern
+	
+	QUANTILE_STEPS = 1000	#the usage quantile table has an entry every 1/QUANTILE_STEPS of the words
+	
+	registry = {}	#absolute path of a word list -> its shared DictionaryWords
+	
+	'''
+	Returns the dictionary for the word list shared by the whole process, loading it the
+	first time it's asked for. Shared dictionaries are read-only: anything that needs to
+	change usage values (such as the n-gram reader) should create its own DictionaryWords
 	'''
-	Loads the list of valid words. 
+	@staticmethod
+	def shared(filename):
+		key = os.path.abspath(filename)
+		dictionary = DictionaryWords.registry.get(key)
+		if dictionary == None:
+			dictionary = DictionaryWords(filename)
+			dictionary.readOnly = True
+			DictionaryWords.registry[key] = dictionary
+		return dictionary
+	
+	'''
+	Loads the list of valid words. The compiled lexicon next to the word list (e.g.
+	media/scrabblewords_usage.lex) is memory-mapped if it is up to date, otherwise
+	the word list is parsed and the compiled lexicon is rebuilt
 	'''
 	def __init__(self, filename):
-		self.words = {}
 		self.lookupTime = 0
+		self.readOnly = False
+		self.allowedTables = {}		#vocabulary -> table for hasWords, built when first needed
+		
+		compiledFilename = os.path.splitext(filename)[0] + DictionaryWords.COMPILED_EXTENSION
+		arrays = lexiconfile.LexiconFile.load(compiledFilename, filename, DictionaryWords.COMPILED_VERSION)
+		if arrays != None:
+			self.dawg = dawg.Dawg()
+			self.dawg.useArrays(arrays)
+			self.usages = arrays['usages']
+			self.signatures = dawg.Dawg()
+			self.signatures.useArrays(arrays, 'sig.')
+			self.anagramStart = arrays['anagramStart']
+			self.anagramWords = arrays['anagramWords']
+			self.usageQuantiles = arrays['usageQuantiles']
+			self.frontHooks = arrays['frontHooks']
+			self.backHooks = arrays['backHooks']
+			self.gapMasks = arrays['gapMasks']
+		else:
+			self.parse(filename)
+			self.buildAnagrams()
+			self.buildUsageQuantiles()
+			self.buildHooks()
+			self.compile(compiledFilename, filename)
+			
+	'''
+	Parses the word list, one word per line optionally followed by its usage count
+	'''
+	def parse(self, filename):
+		entries = []
 		dictFile = open(filename, 'r')
 		for line in dictFile:
 			line = line.rstrip()
@@ -21,8 +77,92 @@ class DictionaryWords:
 				count = -1
 			elif len(tokens) == 2:
 				count = int(tokens[1])
+			else:
+				continue
 				
-			self.words[tokens[0]] = count
+			entries.append((tokens[0], count))
+			
+		#The DAWG needs the words in order, and a repeated word keeps its last count like a dict would
+		entries.sort(key=lambda entry: entry[0])
+		self.dawg = dawg.Dawg(word for (word, count) in entries)
+		self.usages = array.array('i')
+		for (word, count) in entries:
+			if len(self.usages) > 0 and word == lastWord:
+				self.usages[-1] = count
+			else:
+				self.usages.append(count)
+			lastWord = word
+			
+	'''
+	Writes the compiled lexicon for the word list, so later loads can map it directly
+	'''
+	def compile(self, compiledFilename, filename):
+		arrays = self.dawg.arrays()
+		arrays['usages'] = self.usages
+		arrays.update(self.signatures.arrays('sig.'))
+		arrays['anagramStart'] = self.anagramStart
+		arrays['anagramWords'] = self.anagramWords
+		arrays['usageQuantiles'] = self.usageQuantiles
+		arrays['frontHooks'] = self.frontHooks
+		arrays['backHooks'] = self.backHooks
+		arrays['gapMasks'] = self.gapMasks
+		return lexiconfile.LexiconFile.save(compiledFilename, filename, arrays, DictionaryWords.COMPILED_VERSION)
+		
+	'''
+	Builds the usage quantile table: entry k is the usage value which the most used k/QUANTILE_STEPS
+	of the words reach, so usage and vocabulary size can be converted without sorting the usages
+	'''
+	def buildUsageQuantiles(self):
+		values = list(self.usages)
+		values.sort(reverse=True)
+		self.usageQuantiles = array.array('i')
+		for k in range(DictionaryWords.QUANTILE_STEPS+1):
+			massCutoff = min(k * len(values) // DictionaryWords.QUANTILE_STEPS, len(values)-1)
+			self.usageQuantiles.append(values[massCutoff])
+			
+	'''
+	Builds the hook index: for every word (by rank) the mask of letters which can be put in front
+	of it (frontHooks) or after it (backHooks) to spell another word, and for every pair of letters
+	the mask of letters which fit between them in a three letter word (gapMasks). Bit i of a mask
+	stands for the letter chr(ord('A')+i)
+	'''
+	def buildHooks(self):
+		size = len(self.usages)
+		self.frontHooks = array.array('i', [0]) * size
+		self.backHooks = array.array('i', [0]) * size
+		self.gapMasks = array.array('i', [0]) * (26*26)
+		for word in self.dawg.strings():
+			rank = self.dawg.index(word[1:])
+			if rank >= 0:
+				self.frontHooks[rank] |= 1 << (ord(word[0])-ord('A'))
+			rank = self.dawg.index(word[:-1])
+			if rank >= 0:
+				self.backHooks[rank] |= 1 << (ord(word[-1])-ord('A'))
+			if len(word) == 3:
+				self.gapMasks[(ord(word[0])-ord('A'))*26 + ord(word[2])-ord('A')] |= 1 << (ord(word[1])-ord('A'))
+				
+	'''
+	Builds the anagram index: a DAWG of the signatures (sorted letters) of all words and, for
+	each signature by rank, the ranks of the words spelled with exactly those letters
+	'''
+	def buildAnagrams(self):
+		bySignature = []
+		rank = 0
+		for word in self.dawg.strings():
+			bySignature.append(("".join(sorted(word)), rank))
+			rank += 1
+		bySignature.sort()
+		
+		self.signatures = dawg.Dawg(signature for (signature, rank) in bySignature)
+		self.anagramStart = array.array('i')
+		self.anagramWords = array.array('i')
+		previous = None
+		for (signature, rank) in bySignature:
+			if signature != previous:
+				self.anagramStart.append(len(self.anagramWords))
+				previous = signature
+			self.anagramWords.append(rank)
+		self.anagramStart.append(len(self.anagramWords))
 			
 	'''
 	Checks if the word is in the dictionary
@@ -34,22 +174,11 @@ class DictionaryWords:
 			startTime = time.time()
 	
 		#True if the word was in the dictionary
-		if self.words.has_key(word):
-			value = self.words[word]
-			success = True
-			if vocabulary > 0:
-				
-				#give all words a default "1" usage
-				if value <= 0:
-					value = 1
-					
-				if value < vocabulary:
-					success = False
-		
+		rank = self.dawg.index(word)
+		if rank >= 0:
+			success = self.usageAllowed(self.usages[rank], vocabulary)
 		else:
 			success = False
-		
-		
 					
 		if board.Board.DEBUG_ERRORS:
 			timeSpent = time.time()-startTime
@@ -57,47 +186,440 @@ class DictionaryWords:
 		
 		return success
 		
+	'''
+	True if a word with the given usage value may be played with the vocabulary
+	'''
+	def usageAllowed(self, value, vocabulary):
+		if vocabulary > 0:
+			
+			#give all words a default "1" usage
+			if value <= 0:
+				value = 1
+				
+			if value < vocabulary:
+				return False
+				
+		return True
+		
+	'''
+	Returns the usage value reached by the most used fraction (0.0 to 1.0) of the words
+	'''
+	def usageQuantile(self, quantile):
+		return self.usageQuantiles[int(quantile * DictionaryWords.QUANTILE_STEPS + 0.5)]
+		
+	'''
+	Returns roughly what fraction of the words a vocabulary value allows, from the quantile table
+	'''
+	def vocabularyFraction(self, vocabulary):
+		if vocabulary <= 0:
+			return 1.0
+		#the table is in decreasing order, so find the first entry below the vocabulary
+		lo, hi = 0, len(self.usageQuantiles)
+		while lo < hi:
+			mid = (lo + hi) // 2
+			if max(self.usageQuantiles[mid], 1) >= vocabulary:
+				lo = mid + 1
+			else:
+				hi = mid
+		return 1.0 * lo / len(self.usageQuantiles)
+		
+	'''
+	Returns the usage count of the word, None if it isn't in the dictionary
+	'''
+	def usage(self, word):
+		rank = self.dawg.index(word)
+		if rank < 0:
+			return None
+		return self.usages[rank]
+		
+	'''
+	Checks if any word in the dictionary starts with the prefix (including the prefix itself)
+	'''
+	def hasPrefix(self, prefix):
+		return self.find(prefix) != None
+		
+	'''
+	Returns a string of the letters which can follow the prefix in some word, in alphabetical order
+	'''
+	def childrenOf(self, prefix):
+		node = self.find(prefix)
+		if node == None:
+			return ""
+		return self.children(node)
+		
+	'''
+	Walks the DAWG along the prefix and returns the node reached, None if no word starts with it
+	'''
+	def find(self, prefix):
+		node = self.root()
+		for letter in prefix:
+			node = self.child(node, letter)
+			if node == None:
+				return None
+		return node
+		
+	'''
+	Follows the letters down from every one of the nodes, ' ' standing for any letter (a blank),
+	and returns the nodes reached below which some word is valid for the vocabulary. An empty
+	list means no such word starts with any of the prefixes
+	'''
+	def followPrefix(self, nodes, letters, vocabulary = -1):
+		for letter in letters:
+			reached = []
+			for node in nodes:
+				if letter == ' ':
+					for childLetter in self.children(node):
+						reached.append(self.child(node, childLetter))
+				else:
+					target = self.child(node, letter)
+					if target != None:
+						reached.append(target)
+			nodes = [node for node in reached if self.hasWords(node, vocabulary)]
+		return nodes
+		
+	'''
+	Returns the node for the empty prefix. Nodes are (state, rank) pairs, where rank counts the
+	words sorting before the prefix, so the usage of a word is found once its node is reached
+	'''
+	def root(self):
+		return (self.dawg.rootNode, 0)
+		
+	'''
+	Returns the node reached by following letter from node, None if no word continues that way
+	'''
+	def child(self, (state, rank), letter):
+		i = self.dawg.edge(state, letter)
+		if i < 0:
+			return None
+		return (self.dawg.edgeTargets[i], rank + self.dawg.edgeRanks[i])
+		
+	'''
+	Returns a string of the letters leaving the node, in alphabetical order
+	'''
+	def children(self, (state, rank)):
+		return self.dawg.children(state)
+		
+	'''
+	True if the node's prefix is itself a word valid for the vocabulary
+	'''
+	def isWord(self, (state, rank), vocabulary = -1):
+		return self.dawg.isTerminal(state) and self.usageAllowed(self.usages[rank], vocabulary)
+		
+	'''
+	Returns the mask of letters (bit i for chr(ord('A')+i)) which spell a word valid for the
+	vocabulary when put between before and after, e.g. the letters allowed on a square whose
+	crossword would be before+letter+after. Hooks onto a whole word and gaps between two single
+	letters come from the precomputed masks, anything else is found by walking the DAWG
+	'''
+	def crossCheck(self, before, after, vocabulary = -1):
+		mask = None
+		if before == "":
+			rank = self.dawg.index(after)
+			if rank >= 0:
+				mask = self.frontHooks[rank]
+		elif after == "":
+			rank = self.dawg.index(before)
+			if rank >= 0:
+				mask = self.backHooks[rank]
+		elif len(before) == 1 and len(after) == 1:
+			mask = self.gapMasks[(ord(before)-ord('A'))*26 + ord(after)-ord('A')]
+			
+		if mask == None:
+			return self.fillMask(before, after, vocabulary)
+			
+		return self.restrictMask(mask, before, after, vocabulary)
+		
+	'''
+	Takes a cross-check mask computed for every word and drops the letters which make words too
+	obscure for the vocabulary
+	'''
+	def restrictMask(self, mask, before, after, vocabulary):
+		if vocabulary > 0:
+			for i in range(26):
+				if mask & (1 << i) and not self.isValid(before+chr(ord('A')+i)+after, vocabulary):
+					mask &= ~(1 << i)
+		return mask
+		
+	'''
+	Returns the mask of letters which spell a word valid for the vocabulary between before and
+	after, by trying every letter leaving the node of before and following after from it
+	'''
+	def fillMask(self, before, after, vocabulary = -1):
+		mask = 0
+		node = self.find(before)
+		if node == None:
+			return mask
+		for letter in self.children(node):
+			wordNode = self.child(node, letter)
+			for nextLetter in after:
+				wordNode = self.child(wordNode, nextLetter)
+				if wordNode == None:
+					break
+			if wordNode != None and self.isWord(wordNode, vocabulary):
+				mask |= 1 << (ord(letter)-ord('A'))
+		return mask
+		
+	'''
+	True if some word at or below the node is valid for the vocabulary, so a search limited to
+	a vocabulary can drop the node if not. The words below a node are exactly the ranks from
+	the node's rank up to its rank plus its path count, so one lookup in the vocabulary's
+	table (the next allowed rank from every rank) answers it
+	'''
+	def hasWords(self, (state, rank), vocabulary = -1):
+		if vocabulary <= 0:
+			return True
+		return self.allowedTable(vocabulary)[rank] < rank + self.dawg.pathCounts[state]
+		
+	'''
+	Returns the table for hasWords: for every rank, the first rank at or after it whose word
+	is valid for the vocabulary (the number of words if there is none)
+	'''
+	def allowedTable(self, vocabulary):
+		table = self.allowedTables.get(vocabulary)
+		if table == None:
+			size = len(self.usages)
+			table = array.array('i', [size]) * (size+1)
+			nextAllowed = size
+			for rank in range(size-1, -1, -1):
+				if self.usageAllowed(self.usages[rank], vocabulary):
+					nextAllowed = rank
+				table[rank] = nextAllowed
+			self.allowedTables[vocabulary] = table
+		return table
+		
+	'''
+	Returns all words which can be spelled with every one of the required letters (e.g. board
+	letters the word has to go through) plus any of the rack letters, where ' ' in the rack is
+	a blank. Only words between minLength and maxLength letters long are returned, by default
+	up to every letter given.
+	
+	The signature DAWG is walked one letter at a time in alphabetical order, taking each letter
+	from the required letters, then the rack, then a blank, so every sub-multiset of the rack
+	is visited at most once and branches no word can finish are never entered
+	'''
+	def anagrams(self, rack, required = "", minLength = 2, maxLength = None, vocabulary = -1):
+		if maxLength == None:
+			maxLength = len(rack) + len(required)
+			
+		rackCounts = [0] * 26
+		blanks = 0
+		for letter in rack:
+			if letter == ' ':
+				blanks += 1
+			else:
+				rackCounts[ord(letter)-ord('A')] += 1
+				
+		requiredCounts = [0] * 26
+		for letter in required:
+			requiredCounts[ord(letter)-ord('A')] += 1
+			
+		words = []
+		self.walkSignatures(self.signatures.rootNode, 0, 0, rackCounts, blanks, requiredCounts, len(required),
+							minLength, maxLength, vocabulary, words)
+		return words
+		
+	'''
+	Recursive step of anagrams, at a signature node of the given rank and length
+	'''
+	def walkSignatures(self, node, rank, length, rackCounts, blanks, requiredCounts, requiredLeft,
+					   minLength, maxLength, vocabulary, words):
+		signatures = self.signatures
+		
+		if requiredLeft == 0 and length >= minLength and signatures.terminal[node] == 1:
+			for i in range(self.anagramStart[rank], self.anagramStart[rank+1]):
+				wordRank = self.anagramWords[i]
+				if self.usageAllowed(self.usages[wordRank], vocabulary):
+					words.append(self.dawg.string(wordRank))
+					
+		if length >= maxLength:
+			return
+			
+		#Signatures are sorted, so once we pass a required letter it can never be used
+		nextRequired = 26
+		if requiredLeft > 0:
+			nextRequired = 0
+			while requiredCounts[nextRequired] == 0:
+				nextRequired += 1
+				
+		for i in range(signatures.edgeStart[node], signatures.edgeStart[node+1]):
+			index = ord(signatures.edgeLetters[i]) - ord('A')
+			if index > nextRequired:
+				break
+			target = signatures.edgeTargets[i]
+			nextRank = rank + signatures.edgeRanks[i]
+			
+			if requiredCounts[index] > 0:
+				requiredCounts[index] -= 1
+				self.walkSignatures(target, nextRank, length+1, rackCounts, blanks, requiredCounts, requiredLeft-1,
+									minLength, maxLength, vocabulary, words)
+				requiredCounts[index] += 1
+			elif rackCounts[index] > 0:
+				rackCounts[index] -= 1
+				self.walkSignatures(target, nextRank, length+1, rackCounts, blanks, requiredCounts, requiredLeft,
+									minLength, maxLength, vocabulary, words)
+				rackCounts[index] += 1
+			elif blanks > 0:
+				self.walkSignatures(target, nextRank, length+1, rackCounts, blanks-1, requiredCounts, requiredLeft,
+									minLength, maxLength, vocabulary, words)
+									
+	'''
+	Returns the words which fit a slot pattern with tiles from the rack. The pattern has the letter
+	of every square already holding a tile and OPEN for every open square. Words start on the
+	first square, cover at least minLength squares (by default the whole pattern), may only end
+	at the end of the pattern or just before an open square, and use at least one rack tile. The
+	rack is a string of letters with ' ' for a blank.
+	
+	The result is a list of (word, blanks), blanks being the indices of the squares filled by a
+	blank. A word which can be made with either a tile or a blank on a square is returned for
+	both choices, since they score differently
+	'''
+	def wordsFitting(self, pattern, rack, minLength = None, vocabulary = -1):
+		if minLength == None:
+			minLength = len(pattern)
+			
+		rackCounts = [0] * 26
+		blanks = 0
+		for letter in rack:
+			if letter == ' ':
+				blanks += 1
+			else:
+				rackCounts[ord(letter)-ord('A')] += 1
+				
+		words = []
+		self.walkPattern(pattern, 0, self.root(), 0, rackCounts, blanks, minLength, vocabulary, [], [], words)
+		return words
+		
+	'''
+	Returns the words the rack can spell on its own, as wordsFitting would for a slot of empty squares,
+	in a dict of pattern -> (word, blanks) list with a pattern of OPEN squares for every length from 2
+	to the size of the rack. They all come from one walk of the dictionary, which yields each length's
+	words in the order wordsFitting would
+	'''
+	def rackWords(self, rack, vocabulary = -1):
+		words = {}
+		for length in range(2, len(rack)+1):
+			words[DictionaryWords.OPEN * length] = []
+		for (word, blankIndices) in self.wordsFitting(DictionaryWords.OPEN * len(rack), rack, 2, vocabulary):
+			words[DictionaryWords.OPEN * len(word)].append((word, blankIndices))
+		return words
+		
+	'''
+	Recursive step of wordsFitting, at square i of the pattern with the letters spelled so far, placed of
+	them from the rack
+	'''
+	def walkPattern(self, pattern, i, node, placed, rackCounts, blanks, minLength, vocabulary, letters, blankIndices, words):
+		if i >= minLength and (i == len(pattern) or pattern[i] == DictionaryWords.OPEN):
+			if placed > 0 and self.isWord(node, vocabulary):
+				words.append(("".join(letters), blankIndices[:]))
+				
+		if i == len(pattern):
+			return
+			
+		if pattern[i] != DictionaryWords.OPEN:
+			nextNode = self.child(node, pattern[i])
+			if nextNode != None and self.hasWords(nextNode, vocabulary):
+				letters.append(pattern[i])
+				self.walkPattern(pattern, i+1, nextNode, placed, rackCounts, blanks, minLength, vocabulary, letters, blankIndices, words)
+				letters.pop()
+			return
+			
+		for letter in self.children(node):
+			nextNode = self.child(node, letter)
+			if not self.hasWords(nextNode, vocabulary):
+				continue
+			index = ord(letter)-ord('A')
+			letters.append(letter)
+			
+			if rackCounts[index] > 0:
+				rackCounts[index] -= 1
+				self.walkPattern(pattern, i+1, nextNode, placed+1, rackCounts, blanks, minLength, vocabulary, letters, blankIndices, words)
+				rackCounts[index] += 1
+				
+			if blanks > 0:
+				blankIndices.append(i)
+				self.walkPattern(pattern, i+1, nextNode, placed+1, rackCounts, blanks-1, minLength, vocabulary, letters, blankIndices, words)
+				blankIndices.pop()
+				
+			letters.pop()
+			
+	'''
+	Returns the bingos for the rack, words which use every tile on it, either on their own or
+	through one of the given board letters. The result is a list of (word, boardLetter) with
+	boardLetter '' for words made from the rack alone
+	'''
+	def bingos(self, rack, boardLetters = "", vocabulary = -1):
+		results = []
+		for word in self.anagrams(rack, minLength = len(rack), vocabulary = vocabulary):
+			results.append((word, ''))
+		for letter in sorted(set(boardLetters)):
+			for word in self.anagrams(rack, letter, len(rack)+1, len(rack)+1, vocabulary):
+				results.append((word, letter))
+		return results
+		
 	'''
 	Match with blanks returns a list of all blank assignments that
-	correspond to real words
+	correspond to real words.
+	
+	The word is followed down the DAWG, branching over the letters actually leaving the
+	node wherever there is a blank, so a prefix no word starts with is abandoned at once
+	instead of trying all 26 letters for every blank after it
 	'''		
 	def matchWithBlanks(self, word, vocabulary = -1, assignment=[]):
 		
+		if board.Board.DEBUG_ERRORS:
+			startTime = time.time()
+			
+		blankAssignments = []
+		self.walkBlanks(word, 0, self.dawg.rootNode, 0, vocabulary, assignment[:], blankAssignments)
+		
+		if board.Board.DEBUG_ERRORS:
+			timeSpent = time.time()-startTime
+			self.lookupTime += timeSpent
+			
+		return blankAssignments
+		
+	'''
+	Recursive step of matchWithBlanks, from position i of the word at a node of the given rank
+	'''
+	def walkBlanks(self, word, i, node, rank, vocabulary, assignment, blankAssignments):
+		graph = self.dawg
+		
+		#follow the letters up to the next blank
+		while i < len(word) and word[i] != ' ':
+			edge = graph.edgeLetters.find(word[i], graph.edgeStart[node], graph.edgeStart[node+1])
+			if edge < 0:
+				return
+			rank += graph.edgeRanks[edge]
+			node = graph.edgeTargets[edge]
+			i += 1
+			
 		#BASE CASE: all blanks have been filled
-		if not ' ' in word:
-			if self.isValid(word, vocabulary):
-				return [assignment]
-			else:
-				return []
-		else:
-			i = word.find(' ')
-			blankAssignments = []
-			for code in range(ord('A'), ord('Z')+1):
-				char = chr(code)
-				if i == 0:
-					newWord = char + word[1:]
-				elif i == len(word)-1:
-					newWord = word[:-1] + char
-				else:
-					newWord = word[:i] + char + word[i+1:]
-				
-				newAssignment = assignment[:]
-				newAssignment.append(char)
-				results = self.matchWithBlanks(newWord, vocabulary, newAssignment)
-				for result in results:
-					blankAssignments.append(result)
-							
-			return blankAssignments
+		if i == len(word):
+			if graph.terminal[node] == 1 and self.usageAllowed(self.usages[rank], vocabulary):
+				blankAssignments.append(assignment[:])
+			return
+			
+		for edge in range(graph.edgeStart[node], graph.edgeStart[node+1]):
+			target = graph.edgeTargets[edge]
+			targetRank = rank + graph.edgeRanks[edge]
+			if not self.hasWords((target, targetRank), vocabulary):
+				continue
+			assignment.append(graph.edgeLetters[edge])
+			self.walkBlanks(word, i+1, target, targetRank, vocabulary, assignment, blankAssignments)
+			assignment.pop()
 						
 						
 	'''
 	Sets the count of the word in the dictionary
 	'''					
 	def setUsage(self, word, usage):
+		assert not self.readOnly, "Shared dictionaries can't be changed, load a DictionaryWords of your own."
 		word = word.upper()
 		word = word.rstrip()
-		if self.isValid(word):
-			self.words[word] = usage
+		rank = self.dawg.index(word)
+		if rank >= 0:
+			self.usages[rank] = usage
+			self.allowedTables = {}
 			return True
 		else:
 			return False
@@ -107,10 +629,10 @@ class DictionaryWords:
 	'''		
 	def saveUsage(self, filename):
 		with open(filename, 'w') as outfile:
-			keylist = self.words.keys()
-			keylist.sort()
-			for w in keylist:	
-				outfile.write(w+"\t"+str(self.words[w])+"\n")	
+			rank = 0
+			for w in self.dawg.strings():	
+				outfile.write(w+"\t"+str(self.usages[rank])+"\n")	
+				rank += 1
 			
 	'''
 	Resets the lookup time so we can determine time only for querying the hashtable
@@ -142,7 +664,7 @@ if __name__ == '__main__':
 		usages.append( dic.difficultyToUsage(i+1) )
 		
 	word = "PORK"
-	print word+": "+str(dic.words[word])	
+	print word+": "+str(dic.usage(word))	
 	i = 0
 	for usage in usages:
 		i += 1
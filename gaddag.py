@@ -0,0 +1,70 @@
+'''
+GADDAG lexicon: for every word xy (x nonempty) it stores the path REV(x)>y, so a move
+generator can start from any letter already on the board, extend the word leftward
+one letter at a time, then cross the separator and extend it rightward, without ever
+having to guess where the word starts.
+
+The paths are stored in a minimized, array-backed DAWG (see dawg.py).
+'''
+
+import os, dawg, lexiconfile
+
+class Gaddag(dawg.Dawg):
+
+	SEPARATOR = '>'
+	
+	COMPILED_EXTENSION = '.gaddag'
+	COMPILED_VERSION = 1
+
+	'''
+	Builds the GADDAG from a word list file (one word per line, optionally followed by
+	a usage count, as in media/scrabblewords_usage.txt). Building takes a while, so the
+	result is compiled next to the word list (e.g. media/scrabblewords_usage.gaddag) and
+	memory-mapped on later loads, until the word list changes
+	'''
+	def __init__(self, filename):
+		compiledFilename = os.path.splitext(filename)[0] + Gaddag.COMPILED_EXTENSION
+		arrays = lexiconfile.LexiconFile.load(compiledFilename, filename, Gaddag.COMPILED_VERSION)
+		if arrays != None:
+			self.useArrays(arrays)
+			return
+			
+		words = []
+		with open(filename, 'r') as dictFile:
+			for line in dictFile:
+				tokens = line.split()
+				if len(tokens) > 0:
+					words.append(tokens[0])
+
+		self.build(self.paths(words))
+		lexiconfile.LexiconFile.save(compiledFilename, filename, self.arrays(), Gaddag.COMPILED_VERSION)
+
+	'''
+	True if the word is in the GADDAG, by following the path REV(word)>
+	'''
+	def contains(self, word):
+		node = self.rootNode
+		for letter in word[::-1] + Gaddag.SEPARATOR:
+			node = self.child(node, letter)
+			if node == None:
+				return False
+		return self.isTerminal(node)
+
+	'''
+	Generates the GADDAG paths of all words in sorted order. They are generated one leading
+	letter at a time, so only a fraction of them is ever held in memory
+	'''
+	def paths(self, words):
+		for code in range(ord('A'), ord('Z')+1):
+			lead = chr(code)
+
+			paths = []
+			for word in words:
+				i = word.find(lead)
+				while i >= 0:
+					paths.append(word[i::-1] + Gaddag.SEPARATOR + word[i+1:])
+					i = word.find(lead, i+1)
+			paths.sort()
+
+			for path in paths:
+				yield path
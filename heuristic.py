@@ -19,6 +19,13 @@ class Heuristic(object):
 	def adjust(self, trayTiles = None, seedRatio = None, playTiles = None):
 		return 0
 		
+	'''
+	Gives an upper bound on the adjustment of any play of numPlayed tiles from the tray, so
+	the AI can tell when a move can't beat the best one found so far
+	'''
+	def maxAdjust(self, trayTiles, numPlayed):
+		return 0
+		
 #===================================================
 #			HEURISTIC CLASSES
 #===================================================
@@ -76,6 +83,16 @@ class tileQuantileHeuristic(Heuristic):
 			
 		return adjustment
 		seedRatio = None
+		
+	def maxAdjust(self, trayTiles, numPlayed):
+		adjustments = []
+		for tile in trayTiles:
+			if tile.isBlank:
+				adjustments.append(self.letterAdjust['_'])
+			else:
+				adjustments.append(self.letterAdjust[tile.letter])
+		adjustments.sort(reverse=True)
+		return sum(adjustments[:numPlayed])
 
 '''
 This takes another heuristic as an initializing parameter and applies its effect ONLY if
@@ -93,6 +110,11 @@ class notEndGameHeuristic(Heuristic):
 		if len(trayTiles) == player.Player.TRAY_SIZE:
 			adjustment += self.heuristic.adjust(trayTiles = trayTiles, seedRatio = seedRatio, playTiles = playTiles)
 		return adjustment
+		
+	def maxAdjust(self, trayTiles, numPlayed):
+		if len(trayTiles) == player.Player.TRAY_SIZE:
+			return max(self.heuristic.maxAdjust(trayTiles, numPlayed), 0)
+		return 0
 			
 '''
 This is the opposite of notEndGame, applying the heuristic ONLY when we have limited tiles
@@ -108,6 +130,11 @@ class endGameHeuristic(Heuristic):
 		if not len(trayTiles == player.Player.TRAY_SIZE):
 			adjustment += self.heuristic.adjust(trayTiles = trayTiles, seedRatio = seedRatio, playTiles = playTiles)	
 		return adjustment		
+		
+	def maxAdjust(self, trayTiles, numPlayed):
+		if len(trayTiles) != player.Player.TRAY_SIZE:
+			return max(self.heuristic.maxAdjust(trayTiles, numPlayed), 0)
+		return 0
 			
 '''
 This allows for multiple heuristics to be applied simultaneously, iterating through each
@@ -126,4 +153,10 @@ class multiHeuristic(Heuristic):
 		for h in self.heuristics:
 			adjustment += h.adjust(trayTiles = trayTiles, seedRatio = seedRatio, playTiles = playTiles)
 		
+		return adjustment
+		
+	def maxAdjust(self, trayTiles, numPlayed):
+		adjustment = 0
+		for h in self.heuristics:
+			adjustment += h.maxAdjust(trayTiles, numPlayed)
 		return adjustment
\ No newline at end of file
@@ -0,0 +1,142 @@
+'''
+Reads and writes compiled lexicon files, which hold a set of named arrays (such as
+the DAWG of the dictionary) next to the text file they were built from, e.g.
+media/scrabblewords_usage.lex for media/scrabblewords_usage.txt.
+
+The file is memory-mapped when it is loaded and the arrays are used directly from
+the mapping, so loading costs almost nothing and every process using the lexicon
+shares the same pages of the OS file cache. The header records the mtime, size and
+MD5 hash of the text source, and the file is considered stale (so the caller rebuilds
+it) when the source's contents have changed.
+'''
+
+import os, mmap, struct, ctypes, hashlib
+
+class LexiconFile:
+
+	MAGIC = 'WORDSMITHLEX'
+	BYTE_ORDER = 0x01020304		#written natively, so a file from another architecture reads back wrong
+
+	HEADER = struct.Struct('=12siidq16si')
+	ENTRY = struct.Struct('=16scqq')
+
+	ALIGNMENT = 8
+
+	TYPES = {'i': ctypes.c_int32, 'b': ctypes.c_int8}
+
+	'''
+	Writes the arrays to filename, recording the source file they were built from and the
+	version of the writer's layout (bumped whenever arrays are added or changed). Arrays are
+	given as a dict of name -> array.array (typecode 'i' or 'b') or str. The file is written to
+	a temporary name first, so other processes never map a half-written file.
+	Returns False if the file couldn't be written (e.g. the media folder is read-only)
+	'''
+	@staticmethod
+	def save(filename, source, arrays, version):
+		names = sorted(arrays.keys())
+
+		#lay out the data after the header and the table of entries
+		offset = LexiconFile.HEADER.size + LexiconFile.ENTRY.size * len(names)
+		entries = []
+		for name in names:
+			data = arrays[name]
+			if isinstance(data, str):
+				typecode = 'c'
+				raw = data
+			else:
+				typecode = data.typecode
+				raw = data.tostring()
+			offset += (-offset) % LexiconFile.ALIGNMENT
+			entries.append((name, typecode, len(data), offset, raw))
+			offset += len(raw)
+
+		(mtime, size, digest) = LexiconFile.fingerprint(source)
+
+		temporary = filename + '.' + str(os.getpid()) + '.tmp'
+		try:
+			with open(temporary, 'wb') as outfile:
+				outfile.write(LexiconFile.HEADER.pack(LexiconFile.MAGIC, version, LexiconFile.BYTE_ORDER,
+													  mtime, size, digest, len(names)))
+				for (name, typecode, count, offset, raw) in entries:
+					outfile.write(LexiconFile.ENTRY.pack(name, typecode, count, offset))
+				for (name, typecode, count, offset, raw) in entries:
+					outfile.write('\0' * (offset - outfile.tell()))
+					outfile.write(raw)
+			os.rename(temporary, filename)
+		except (IOError, OSError):
+			if os.path.exists(temporary):
+				os.remove(temporary)
+			return False
+
+		return True
+
+	'''
+	Maps the file and returns a dict of name -> array (ctypes arrays over the mapping, or str
+	for character data), or None if the file is missing, unreadable, of another version or
+	stale for the source
+	'''
+	@staticmethod
+	def load(filename, source, version):
+		try:
+			with open(filename, 'rb') as infile:
+				#a private (copy-on-write) mapping, pages are shared until someone writes to them
+				data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_COPY)
+		except (IOError, OSError, ValueError):
+			return None
+
+		if len(data) < LexiconFile.HEADER.size:
+			return None
+		(magic, fileVersion, byteOrder, mtime, size, digest, numArrays) = LexiconFile.HEADER.unpack_from(data, 0)
+		if magic != LexiconFile.MAGIC or fileVersion != version or byteOrder != LexiconFile.BYTE_ORDER:
+			return None
+
+		if not LexiconFile.isFresh(filename, source, mtime, size, digest):
+			return None
+
+		arrays = {}
+		for i in range(numArrays):
+			(name, typecode, count, offset) = LexiconFile.ENTRY.unpack_from(data, LexiconFile.HEADER.size + LexiconFile.ENTRY.size * i)
+			name = name.rstrip('\0')
+			if typecode == 'c':
+				arrays[name] = data[offset:offset+count]
+			else:
+				arrays[name] = (LexiconFile.TYPES[typecode] * count).from_buffer(data, offset)
+
+		return arrays
+
+	'''
+	True if the source hasn't changed since the file was built. The mtime and size are checked
+	first, and only if they differ is the source hashed, so touching the source (or checking it
+	out again) doesn't force a rebuild; the new mtime is then recorded in the file
+	'''
+	@staticmethod
+	def isFresh(filename, source, mtime, size, digest):
+		if not os.path.exists(source):
+			return True
+
+		stat = os.stat(source)
+		if stat.st_mtime == mtime and stat.st_size == size:
+			return True
+
+		(newMtime, newSize, newDigest) = LexiconFile.fingerprint(source)
+		if newDigest != digest:
+			return False
+
+		try:
+			with open(filename, 'r+b') as outfile:
+				outfile.seek(struct.calcsize('=12sii'))
+				outfile.write(struct.pack('=dq', newMtime, newSize))
+		except (IOError, OSError):
+			pass
+		return True
+
+	'''
+	Returns the (mtime, size, MD5 digest) of the source file
+	'''
+	@staticmethod
+	def fingerprint(source):
+		stat = os.stat(source)
+		md5 = hashlib.md5()
+		with open(source, 'rb') as infile:
+			md5.update(infile.read())
+		return (stat.st_mtime, stat.st_size, md5.digest())
@@ -0,0 +1,169 @@
+'''
+A move as a small immutable value: the square its main word starts on, the direction the word
+runs, the whole word spelled (letters already on the board included), which of its letters are
+blanks played from the tray and the points it's worth. Unlike a list of ((x, y), Tile) pairs
+it can be hashed, compared, cached and sent to another process, and it packs into a few bytes.
+
+The tiles themselves aren't part of the move: placement finds them on a tray when the move is
+played or validated (see Board.applyMove and Board.validateMove).
+'''
+
+import struct
+
+class Move(object):
+
+	__slots__ = ('start', 'direction', 'word', 'blankMask', 'score')
+
+	ACROSS = 'across'		#the same values as Board.ACROSS and Board.DOWN
+	DOWN = 'down'
+
+	#x, y, direction, blank mask and score, then the word: 13 bytes, so coordinates below 256 and
+	#(with the H blank mask) words of at most 16 letters
+	ENCODING = struct.Struct('=BBBHd')
+
+	'''
+	Makes a move whose main word starts at start = (x, y), where bit i of blankMask is set if
+	the i-th letter of the word is a blank from the tray
+	'''
+	def __init__(self, start, direction, word, blankMask, score):
+		assert direction == Move.ACROSS or direction == Move.DOWN
+		object.__setattr__(self, 'start', start)
+		object.__setattr__(self, 'direction', direction)
+		object.__setattr__(self, 'word', word)
+		object.__setattr__(self, 'blankMask', blankMask)
+		object.__setattr__(self, 'score', score)
+
+	def __setattr__(self, name, value):
+		raise AttributeError("Move is immutable")
+
+	def __eq__(self, other):
+		return isinstance(other, Move) and self.key() == other.key()
+
+	def __ne__(self, other):
+		return not self == other
+
+	def __hash__(self):
+		return hash(self.key())
+
+	def __repr__(self):
+		return "Move("+str(self.start)+", "+self.direction+", "+self.word+", "+str(self.blankMask)+", "+str(self.score)+")"
+
+	'''
+	Pickles by its fields, as __slots__ classes have no __dict__ to pickle
+	'''
+	def __reduce__(self):
+		return (Move, self.key())
+
+	'''
+	Returns the fields as a tuple, which moves are compared and hashed by
+	'''
+	def key(self):
+		return (self.start, self.direction, self.word, self.blankMask, self.score)
+
+	'''
+	Returns the move packed into a string of bytes
+	'''
+	def encode(self):
+		(x, y) = self.start
+		return Move.ENCODING.pack(x, y, 0 if self.direction == Move.ACROSS else 1, self.blankMask, self.score) + self.word
+
+	'''
+	Unpacks a move from the bytes made by encode
+	'''
+	@staticmethod
+	def decode(data):
+		(x, y, direction, blankMask, score) = Move.ENCODING.unpack_from(data, 0)
+		return Move((x, y), Move.ACROSS if direction == 0 else Move.DOWN, data[Move.ENCODING.size:], blankMask, score)
+
+	'''
+	Returns the squares of the main word as ((x, y), letter, isBlank)
+	'''
+	def squares(self):
+		(x, y) = self.start
+		if self.direction == Move.ACROSS:
+			(dx, dy) = (1, 0)
+		else:
+			(dx, dy) = (0, 1)
+		return [((x+i*dx, y+i*dy), self.word[i], (self.blankMask >> i) & 1 == 1) for i in range(len(self.word))]
+
+	'''
+	Returns the tiles the move takes from the tray as (tilesPlaced, blanks), in the form the
+	search and Board.validateWords use: tilesPlaced the ((x, y), tile) of every empty square of
+	the word, blanks the letters of its blanks in order. Returns None if a letter already on the
+	board doesn't match the word, or the tray doesn't hold the tiles
+	'''
+	def placement(self, theBoard, tray):
+		unused = list(tray)
+		tilesPlaced = []
+		blanks = []
+		for ((x, y), letter, isBlank) in self.squares():
+			boardTile = theBoard.squares[x][y][0]
+			if boardTile != None:
+				if boardTile.letter != letter:
+					return None
+				continue
+
+			for t in unused:
+				if t.isBlank == isBlank and (isBlank or t.letter == letter):
+					break
+			else:
+				return None
+			unused.remove(t)
+			tilesPlaced.append(((x, y), t))
+			if isBlank:
+				blanks.append(letter)
+
+		return (tilesPlaced, blanks)
+
+	'''
+	Makes the move of a placement (tilesPlaced and blanks as above) on the board as it is, before
+	the tiles are put down. The main word is the line of the tiles placed, or for a single tile
+	the one it extends across, or else down
+	'''
+	@staticmethod
+	def fromPlacement(theBoard, tilesPlaced, blanks, score):
+		positions = [pos for (pos, tile) in tilesPlaced]
+		letters = {}
+		blankSquares = {}
+		i = 0
+		for (pos, tile) in tilesPlaced:
+			if tile.isBlank:
+				letters[pos] = blanks[i]
+				blankSquares[pos] = True
+				i += 1
+			else:
+				letters[pos] = tile.letter
+
+		(x, y) = min(positions)
+		if len(positions) > 1:
+			if positions[0][1] == positions[1][1]:
+				direction = Move.ACROSS
+			else:
+				direction = Move.DOWN
+		elif ((x > 0 and theBoard.squares[x-1][y][0] != None) or
+			  (x < len(theBoard.squares)-1 and theBoard.squares[x+1][y][0] != None)):
+			direction = Move.ACROSS
+		else:
+			direction = Move.DOWN
+		(dx, dy) = (1, 0) if direction == Move.ACROSS else (0, 1)
+
+		#back up to the start of the word, then read it through to its end
+		def occupied(x, y):
+			return (x >= 0 and y >= 0 and x < len(theBoard.squares) and y < len(theBoard.squares) and
+					(letters.has_key((x, y)) or theBoard.squares[x][y][0] != None))
+		while occupied(x-dx, y-dy):
+			(x, y) = (x-dx, y-dy)
+		start = (x, y)
+
+		word = ""
+		blankMask = 0
+		while occupied(x, y):
+			if letters.has_key((x, y)):
+				if blankSquares.has_key((x, y)):
+					blankMask |= 1 << len(word)
+				word += letters[(x, y)]
+			else:
+				word += theBoard.squares[x][y][0].letter
+			(x, y) = (x+dx, y+dy)
+
+		return Move(start, direction, word, blankMask, score)
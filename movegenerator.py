@@ -0,0 +1,336 @@
+'''
+Generates every legal placement for a tray using the Appel-Jacobson algorithm.
+Rather than trying every ordering of the tray in every slot and checking the
+dictionary afterwards, words are grown outward from anchor squares (empty squares
+adjacent to a played tile) while walking the lexicon one letter at a time. Each
+empty square carries a cross-check set of the letters which form a valid
+perpendicular word there, so only placements spelling real words are produced.
+'''
+
+import board, gaddag
+
+class MoveGenerator:
+
+	ACROSS = 'across'		#the same directions as Board.ACROSS and Board.DOWN
+	DOWN = 'down'
+
+	'''
+	Initializes the generator for a board and a dictionary, only words with at least
+	the given vocabulary (usage) value will be generated. If a GADDAG built from the
+	same word list is given, words are grown from the anchor in both directions with it
+	'''
+	def __init__(self, theBoard, dictionary, vocabulary = -1, theGaddag = None):
+		self.theBoard = theBoard
+		self.dictionary = dictionary
+		self.vocabulary = vocabulary
+		self.gaddag = theGaddag
+		self.crossChecks = {}
+
+	'''
+	Returns a list of (direction, (x, y)) anchors to generate moves from, taken from the
+	anchors the board keeps up to date. This also takes the cross-check masks for both
+	directions (restricted to the vocabulary), so it should be called at the start of every
+	turn before movesAt
+	'''
+	def findAnchors(self, isFirstTurn):
+		if isFirstTurn:
+			anchors = [board.Board.START_POSITION]
+		else:
+			anchors = sorted(self.theBoard.anchors.keys())
+
+		self.anchorSet = {}
+		for pos in anchors:
+			self.anchorSet[pos] = True
+
+		self.crossChecks[MoveGenerator.ACROSS] = self.restrictCrossChecks(MoveGenerator.ACROSS)
+		self.crossChecks[MoveGenerator.DOWN] = self.restrictCrossChecks(MoveGenerator.DOWN)
+
+		return [(direction, pos) for pos in anchors for direction in (MoveGenerator.ACROSS, MoveGenerator.DOWN)]
+
+	'''
+	Returns the board's map of (x, y) -> mask of the letters allowed on that square for words
+	played in the given direction, with the letters outside the vocabulary dropped. Squares
+	without perpendicular neighbours are left out (any letter works)
+	'''
+	def restrictCrossChecks(self, direction):
+		boardChecks = self.theBoard.crossChecks[direction]
+		if self.vocabulary <= 0:
+			return boardChecks
+
+		crossChecks = {}
+		for pos in boardChecks.keys():
+			(before, after) = self.theBoard.crossWords[direction][pos]
+			crossChecks[pos] = self.dictionary.restrictMask(boardChecks[pos], before, after, self.vocabulary)
+		return crossChecks
+
+	'''
+	Returns the (dx, dy) step for a word running in the given direction
+	'''
+	def step(self, direction):
+		if direction == MoveGenerator.ACROSS:
+			return (1, 0)
+		return (0, 1)
+
+	'''
+	Generates all legal placements whose main word runs in the given direction through the
+	anchor square, using tiles from the tray. Each placement is yielded as a tuple of
+	(tilesPlaced, blanks) where tilesPlaced is a list of ((x, y), tile) and blanks holds the
+	letters assigned to blank tiles, in the order they appear in tilesPlaced
+	'''
+	def movesAt(self, direction, anchor, trayTiles):
+
+		(rack, blankTiles) = self.sortRack(trayTiles)
+
+		if self.gaddag != None:
+			for move in self.gen(direction, anchor, 0, "", [], rack, blankTiles, self.gaddag.root()):
+				yield move
+			return
+
+		squares = self.theBoard.squares
+		(dx, dy) = self.step(direction)
+		(x, y) = anchor
+
+		#If tiles are already played before the anchor they form a fixed left part
+		if x-dx >= 0 and y-dy >= 0 and squares[x-dx][y-dy][0] != None:
+			xPos, yPos = x-dx, y-dy
+			prefix = ""
+			while xPos >= 0 and yPos >= 0 and squares[xPos][yPos][0] != None:
+				prefix = squares[xPos][yPos][0].letter + prefix
+				xPos, yPos = xPos-dx, yPos-dy
+			node = self.dictionary.find(prefix)
+			if node == None:
+				return
+			for move in self.extendRight(direction, anchor, (x, y), node, [], rack, blankTiles):
+				yield move
+
+		#Otherwise the left part is built from tray tiles on the empty, non-anchor squares
+		else:
+			limit = 0
+			xPos, yPos = x-dx, y-dy
+			while (xPos >= 0 and yPos >= 0 and limit < len(trayTiles)-1 and
+				   squares[xPos][yPos][0] == None and not self.anchorSet.has_key((xPos, yPos))):
+				limit += 1
+				xPos, yPos = xPos-dx, yPos-dy
+			for move in self.leftPart(direction, anchor, self.dictionary.root(), [], limit, rack, blankTiles):
+				yield move
+
+	'''
+	Builds every left part (up to limit tiles long) which is a prefix in the lexicon, and extends
+	each one rightward through the anchor
+	'''
+	def leftPart(self, direction, anchor, node, placed, limit, rack, blankTiles):
+
+		#The left part occupies the squares directly before the anchor
+		(dx, dy) = self.step(direction)
+		(x, y) = anchor
+		start = len(placed)
+		positioned = []
+		for i in range(start):
+			(pos, t, letter) = placed[i]
+			positioned.append(((x-dx*(start-i), y-dy*(start-i)), t, letter))
+
+		for move in self.extendRight(direction, anchor, anchor, node, positioned, rack, blankTiles):
+			yield move
+
+		if limit > 0:
+			for letter in self.dictionary.children(node):
+				nextNode = self.dictionary.child(node, letter)
+				if not self.dictionary.hasWords(nextNode, self.vocabulary):
+					continue
+
+				tiles = rack.get(letter)
+				if tiles:
+					t = tiles.pop()
+					placed.append((None, t, letter))
+					for move in self.leftPart(direction, anchor, nextNode, placed, limit-1, rack, blankTiles):
+						yield move
+					placed.pop()
+					tiles.append(t)
+
+				if len(blankTiles) > 0:
+					t = blankTiles.pop()
+					placed.append((None, t, letter))
+					for move in self.leftPart(direction, anchor, nextNode, placed, limit-1, rack, blankTiles):
+						yield move
+					placed.pop()
+					blankTiles.append(t)
+
+	'''
+	Extends the partial word rightward (or downward) from the given square, following played
+	tiles on the board and filling empty squares with tray tiles allowed by the cross-checks
+	'''
+	def extendRight(self, direction, anchor, (x, y), node, placed, rack, blankTiles):
+		squares = self.theBoard.squares
+		size = board.Board.GRID_SIZE
+		(dx, dy) = self.step(direction)
+
+		onBoard = x < size and y < size
+
+		if not onBoard or squares[x][y][0] == None:
+
+			#A word ends here, it's legal if we've covered the anchor
+			if (x, y) != anchor and len(placed) > 0 and self.dictionary.isWord(node, self.vocabulary):
+				if not self.isDuplicate(direction, placed):
+					yield self.toPlacement(placed)
+
+			if onBoard:
+				allowed = self.crossChecks[direction].get((x, y))
+				for letter in self.dictionary.children(node):
+					if allowed != None and not allowed & (1 << (ord(letter)-ord('A'))):
+						continue
+					nextNode = self.dictionary.child(node, letter)
+					if not self.dictionary.hasWords(nextNode, self.vocabulary):
+						continue
+
+					tiles = rack.get(letter)
+					if tiles:
+						t = tiles.pop()
+						placed.append(((x, y), t, letter))
+						for move in self.extendRight(direction, anchor, (x+dx, y+dy), nextNode, placed, rack, blankTiles):
+							yield move
+						placed.pop()
+						tiles.append(t)
+
+					if len(blankTiles) > 0:
+						t = blankTiles.pop()
+						placed.append(((x, y), t, letter))
+						for move in self.extendRight(direction, anchor, (x+dx, y+dy), nextNode, placed, rack, blankTiles):
+							yield move
+						placed.pop()
+						blankTiles.append(t)
+		else:
+			nextNode = self.dictionary.child(node, squares[x][y][0].letter)
+			if nextNode != None and self.dictionary.hasWords(nextNode, self.vocabulary):
+				for move in self.extendRight(direction, anchor, (x+dx, y+dy), nextNode, placed, rack, blankTiles):
+					yield move
+
+	'''
+	GADDAG generation (Gordon's Gen): tries to put a letter on the square offset from the
+	anchor, either following the tile already there or playing one from the tray. Negative
+	offsets are left of (or above) the anchor, the left part is built first, in reverse
+	'''
+	def gen(self, direction, anchor, offset, word, placed, rack, blankTiles, node):
+		squares = self.theBoard.squares
+		(dx, dy) = self.step(direction)
+		(x, y) = (anchor[0] + dx*offset, anchor[1] + dy*offset)
+
+		if squares[x][y][0] != None:
+			letter = squares[x][y][0].letter
+			nextNode = self.gaddag.child(node, letter)
+			if nextNode != None:
+				for move in self.goOn(direction, anchor, offset, letter, word, placed, rack, blankTiles, nextNode):
+					yield move
+		else:
+			allowed = self.crossChecks[direction].get((x, y))
+			for letter in self.gaddag.children(node):
+				if letter == gaddag.Gaddag.SEPARATOR or (allowed != None and not allowed & (1 << (ord(letter)-ord('A')))):
+					continue
+				nextNode = self.gaddag.child(node, letter)
+
+				tiles = rack.get(letter)
+				if tiles:
+					t = tiles.pop()
+					placed.append(((x, y), t, letter))
+					for move in self.goOn(direction, anchor, offset, letter, word, placed, rack, blankTiles, nextNode):
+						yield move
+					placed.pop()
+					tiles.append(t)
+
+				if len(blankTiles) > 0:
+					t = blankTiles.pop()
+					placed.append(((x, y), t, letter))
+					for move in self.goOn(direction, anchor, offset, letter, word, placed, rack, blankTiles, nextNode):
+						yield move
+					placed.pop()
+					blankTiles.append(t)
+
+	'''
+	GADDAG generation (Gordon's GoOn): records the word if it is complete, then keeps growing
+	it leftward, switches to growing rightward through the separator, or keeps growing rightward.
+	The left part may not cover another (empty) anchor, so every move comes from one anchor only
+	'''
+	def goOn(self, direction, anchor, offset, letter, word, placed, rack, blankTiles, node):
+		squares = self.theBoard.squares
+		size = board.Board.GRID_SIZE
+		(dx, dy) = self.step(direction)
+		(x, y) = anchor
+
+		if offset <= 0:
+			word = letter + word
+			(leftX, leftY) = (x + dx*(offset-1), y + dy*(offset-1))
+			(rightX, rightY) = (x + dx, y + dy)
+			leftOnBoard = leftX >= 0 and leftY >= 0
+			rightOnBoard = rightX < size and rightY < size
+			leftEmpty = not leftOnBoard or squares[leftX][leftY][0] == None
+			rightEmpty = not rightOnBoard or squares[rightX][rightY][0] == None
+
+			separated = self.gaddag.child(node, gaddag.Gaddag.SEPARATOR)
+			if separated != None and self.gaddag.isTerminal(separated) and leftEmpty and rightEmpty:
+				for move in self.record(direction, word, placed):
+					yield move
+
+			if leftOnBoard and not (leftEmpty and self.anchorSet.has_key((leftX, leftY))):
+				for move in self.gen(direction, anchor, offset-1, word, placed, rack, blankTiles, node):
+					yield move
+
+			if separated != None and leftEmpty and rightOnBoard:
+				for move in self.gen(direction, anchor, 1, word, placed, rack, blankTiles, separated):
+					yield move
+		else:
+			word = word + letter
+			(rightX, rightY) = (x + dx*(offset+1), y + dy*(offset+1))
+			rightOnBoard = rightX < size and rightY < size
+			rightEmpty = not rightOnBoard or squares[rightX][rightY][0] == None
+
+			if self.gaddag.isTerminal(node) and rightEmpty:
+				for move in self.record(direction, word, placed):
+					yield move
+
+			if rightOnBoard:
+				for move in self.gen(direction, anchor, offset+1, word, placed, rack, blankTiles, node):
+					yield move
+
+	'''
+	Yields the placement for a complete word found in the GADDAG, which knows nothing of
+	word usage, so the vocabulary is checked against the dictionary here
+	'''
+	def record(self, direction, word, placed):
+		if self.vocabulary > 0 and not self.dictionary.isValid(word, self.vocabulary):
+			return
+		if not self.isDuplicate(direction, placed):
+			yield self.toPlacement(placed)
+
+	'''
+	Sorts the tray into stacks of tiles by letter (so identical tiles are only tried once)
+	and a list of blank tiles
+	'''
+	def sortRack(self, trayTiles):
+		rack = {}
+		blankTiles = []
+		for t in trayTiles:
+			if t.isBlank:
+				blankTiles.append(t)
+			else:
+				rack.setdefault(t.letter, []).append(t)
+		return (rack, blankTiles)
+
+	'''
+	A single tile forming words in both directions is generated by both the across and down
+	passes, so the down pass skips it if it has a horizontal neighbour
+	'''
+	def isDuplicate(self, direction, placed):
+		if direction == MoveGenerator.DOWN and len(placed) == 1:
+			return self.crossChecks[direction].has_key(placed[0][0])
+		return False
+
+	'''
+	Converts the internal placement into the (tilesPlaced, blanks) format used by the Player
+	'''
+	def toPlacement(self, placed):
+		tilesPlaced = []
+		blanks = []
+		for (pos, t, letter) in placed:
+			tilesPlaced.append((pos, t))
+			if t.isBlank:
+				blanks.append(letter)
+		return (tilesPlaced, blanks)
@@ -0,0 +1,202 @@
+'''
+Optional parallel move search. The anchors of a turn are dealt out to a pool of worker
+processes, each of which runs the same anchor search as Player on its share and returns
+its best move. The workers are forked from the game after the lexicon is loaded, so they
+start with it (the compiled lexicon is memory-mapped, so its pages are shared), and every
+turn they are only sent a snapshot of the board's tiles and the rack.
+
+Every move is numbered by (anchor index, move index) in the order the serial search would
+find it, and ties go to the lower number, so the move chosen is the one the serial search
+would choose whatever the number of workers (as long as no worker runs out of time).
+
+The same workers also ponder: while the opponent is thinking, they find the best move at
+every anchor of the board as it is, until told to stop, so the player only has to search
+again the lines the opponent's move changed.
+'''
+
+import multiprocessing, time
+import board, tile, bag, move
+
+worker = None			#the player searching in this worker process, set up by initWorker
+stopPondering = None	#event set by the pool owner when pondering should stop
+
+'''
+Sets up a worker process with a player of its own, searching with the same difficulty and
+heuristic as the player who owns the pool
+'''
+def initWorker(difficulty, theHeuristic, stopEvent):
+	global worker, stopPondering
+	import ai
+	stopPondering = stopEvent
+	worker = ai.AI(board.Board(), bag.Bag(), difficulty, theHeuristic)
+	worker.numValidations = 0
+	worker.numRawValidations = 0
+	worker.validationTime = 0
+	worker.maxScore = -1
+	worker.maxWordTimeStamp = time.time()
+
+'''
+Searches one worker's share of the anchors, given as (index, (direction, anchor)), until the
+deadline passes. Returns (points, (anchor index, move index), encoded move) for the best move
+found (see move.Move.encode), or None if there wasn't one
+'''
+def searchAnchors((boardTiles, trayTiles, isFirstTurn, anchors, deadline)):
+	restore(boardTiles, trayTiles, isFirstTurn)
+
+	best = None
+	for (index, (direction, anchor)) in anchors:
+		if time.time() > deadline:
+			break
+
+		moveIndex = 0
+		for (tilesPlaced, blanks) in worker.moveGenerator.movesAt(direction, anchor, worker.tray):
+			points = worker.scorePlacement(isFirstTurn, tilesPlaced, blanks)
+			if points > -1000 and (best == None or points > best[0]):
+				best = (points, (index, moveIndex), move.Move.fromPlacement(worker.theBoard, tilesPlaced, blanks, points).encode())
+			moveIndex += 1
+
+	return best
+
+'''
+Finds the best move at each of one worker's share of the anchors, given as (direction, anchor),
+until stopPondering is set. Returns a dict of (direction, anchor) -> encoded move for every anchor
+searched to the end, the value being None if it had no move
+'''
+def ponderAnchors((boardTiles, trayTiles, anchors)):
+	restore(boardTiles, trayTiles, False)
+
+	results = {}
+	for (direction, anchor) in anchors:
+		best = None
+		for (tilesPlaced, blanks) in worker.moveGenerator.movesAt(direction, anchor, worker.tray):
+			if stopPondering.is_set():
+				return results
+			points = worker.scorePlacement(False, tilesPlaced, blanks)
+			if points > -1000 and (best == None or points > best[0]):
+				best = (points, tilesPlaced, blanks)
+		if best != None:
+			(points, tilesPlaced, blanks) = best
+			best = move.Move.fromPlacement(worker.theBoard, tilesPlaced, blanks, points).encode()
+		results[(direction, anchor)] = best
+
+	return results
+
+'''
+Sets the worker's board and tray up as in the snapshot (see snapshot) and finds its anchors
+'''
+def restore(boardTiles, trayTiles, isFirstTurn):
+	theBoard = worker.theBoard
+	for x in range(board.Board.GRID_SIZE):
+		for y in range(board.Board.GRID_SIZE):
+			theBoard.squares[x][y] = (None, theBoard.squares[x][y][1])
+	for (x, y, letter, points, isBlank) in boardTiles:
+		boardTile = tile.Tile(letter, points)
+		boardTile.isBlank = isBlank
+		boardTile.locked = True
+		theBoard.squares[x][y] = (boardTile, theBoard.squares[x][y][1])
+	theBoard.rebuildHash()
+	theBoard.rebuildAnchors()
+
+	worker.tray = [tile.Tile(letter, points) for (letter, points) in trayTiles]
+	worker.moveGenerator.findAnchors(isFirstTurn)
+
+'''
+Returns the tiles on the board as (x, y, letter, points, isBlank) and the tray as (letter,
+points), blanks being ' ', to be sent to the workers
+'''
+def snapshot(theBoard, tray):
+	boardTiles = []
+	for x in range(board.Board.GRID_SIZE):
+		for y in range(board.Board.GRID_SIZE):
+			boardTile = theBoard.squares[x][y][0]
+			if boardTile != None:
+				boardTiles.append((x, y, boardTile.letter, boardTile.points, boardTile.isBlank))
+	trayTiles = []
+	for t in tray:
+		if t.isBlank:
+			trayTiles.append((' ', t.points))
+		else:
+			trayTiles.append((t.letter, t.points))
+	return (boardTiles, trayTiles)
+
+class SearchPool:
+
+	'''
+	Starts the worker processes, each with its own player of the given difficulty and heuristic
+	'''
+	def __init__(self, numWorkers, difficulty, theHeuristic):
+		self.numWorkers = numWorkers
+		self.stopPondering = multiprocessing.Event()
+		self.pondering = None
+		self.pool = multiprocessing.Pool(numWorkers, initWorker, (difficulty, theHeuristic, self.stopPondering))
+
+	'''
+	Searches the anchors (as returned by MoveGenerator.findAnchors) on the workers, stopping at
+	the deadline (a time.time() value). Returns the best move.Move, None if there was no move.
+	If given, progress is called with the fraction of the workers done each time one finishes
+	'''
+	def search(self, theBoard, tray, isFirstTurn, anchors, deadline, progress = None):
+		(boardTiles, trayTiles) = snapshot(theBoard, tray)
+
+		#Deal the anchors out in turn, so every worker gets a share of each part of the board
+		indexed = list(enumerate(anchors))
+		tasks = []
+		for i in range(self.numWorkers):
+			tasks.append((boardTiles, trayTiles, isFirstTurn, indexed[i::self.numWorkers], deadline))
+
+		#ties are broken by the move numbers, so the order the results come back in doesn't matter
+		best = None
+		numDone = 0
+		for result in self.pool.imap_unordered(searchAnchors, tasks):
+			numDone += 1
+			if progress != None:
+				progress(1.0 * numDone / len(tasks))
+			if result == None:
+				continue
+			if best == None or result[0] > best[0] or (result[0] == best[0] and result[1] < best[1]):
+				best = result
+
+		if best == None:
+			return None
+		(points, order, encoded) = best
+		return move.Move.decode(encoded)
+
+	'''
+	Starts pondering the anchors (as returned by MoveGenerator.findAnchors, for a turn other than
+	the first) in the background and returns at once. The results are picked up by pondered
+	'''
+	def ponder(self, theBoard, tray, anchors):
+		(boardTiles, trayTiles) = snapshot(theBoard, tray)
+		tasks = []
+		for i in range(self.numWorkers):
+			tasks.append((boardTiles, trayTiles, anchors[i::self.numWorkers]))
+
+		self.stopPondering.clear()
+		self.pondering = self.pool.map_async(ponderAnchors, tasks)
+
+	'''
+	Stops pondering and returns the dict of (direction, anchor) -> move.Move of the anchors the
+	workers got through (None for those without a move)
+	'''
+	def pondered(self):
+		if self.pondering == None:
+			return {}
+		self.stopPondering.set()
+		results = {}
+		for part in self.pondering.get():
+			for (anchor, encoded) in part.items():
+				if encoded == None:
+					results[anchor] = None
+				else:
+					results[anchor] = move.Move.decode(encoded)
+		self.pondering = None
+		return results
+
+	'''
+	Stops pondering and the worker processes
+	'''
+	def close(self):
+		self.stopPondering.set()
+		self.pondering = None
+		self.pool.terminate()
+		self.pool.join()
@@ -3,8 +3,8 @@ Generic player object, can be inherited by Human or AI classes which
 execute the actions of the player by either GUI interaction or algorithm
 '''
 
-import pygame, time
-import board, tile, bag, aistats, heuristic
+import pygame, time, heapq, collections, random
+import board, tile, bag, aistats, heuristic, movegenerator, gaddag, dictionarywords, parallelsearch, move
 from pygame.locals import *
 
 class Player:
@@ -21,7 +21,27 @@ class Player:
 	FONT_COLOR = (55, 46, 40)
 	BACKGROUND_COLOR = (255, 255, 255)
 	
-	TIMEOUT = 15	
+	TIMEOUT = 15			#the most time (in seconds) a turn may take
+	MIN_TIME_BUDGET = 3		#the time given to the simplest turns
+	FULL_TIME_FLOOR = True	#if True, a player with the whole time share never gets less than TIMEOUT
+	
+	ANCHOR_SEARCH = True	#if False, the AI falls back to the brute-force tile slot search
+	GADDAG_SEARCH = False	#if True, the anchor search walks a GADDAG (slow to build, once per run)
+	PATTERN_SEARCH = True	#if True, the tile slot search asks the dictionary which words fit each slot
+	BRANCH_AND_BOUND = True	#if True, the tile slot search skips slots whose score bound can't beat the best move
+	PARALLEL_WORKERS = 0	#if above 0, the anchor search is split across this many worker processes
+	PONDER = False			#if True, the AI searches in a worker process while its opponent thinks
+	MOVE_CACHE_SIZE = 64	#the number of searched positions whose best move is remembered
+	EXCHANGE_SEARCH = True	#if True, the AI weighs exchanging part of its tray against its best move
+	
+	#Search budget per difficulty, the first entry at or above the player's difficulty is used:
+	#(difficulty, most moves scored, most anchors or tile slots searched, share of the time budget,
+	#number of best moves the one played is picked from at random), None meaning no limit
+	SEARCH_BUDGETS = [(2, 60, 12, 0.25, 4),
+					  (4, 200, 30, 0.4, 3),
+					  (6, 600, 80, 0.6, 2),
+					  (8, 2000, 200, 0.8, 1),
+					  (10, None, None, 1.0, 1)]
 	
 	TRAY_SIZE = 7
 	
@@ -32,6 +52,12 @@ class Player:
 		Player.FONT = pygame.font.Font('freesansbold.ttf', 18)
 		Player.initialized = True
 		Player.aiStats = aistats.AIStats()	
+		Player.slotValues = aistats.AIStats.loadSlotValues()
+		Player.anchorValues = aistats.AIStats.loadAnchorValues()
+		Player.leaveValues = aistats.AIStats.loadLeaveValues()
+		Player.gaddag = None
+		if Player.GADDAG_SEARCH:
+			Player.gaddag = gaddag.Gaddag(board.Board.DICTIONARY_FILE)
 	
 	
 	'''
@@ -49,9 +75,29 @@ class Player:
 		self.lastScorePulse = 0
 		self.lastScore = 0
 		
+		self.difficulty = theDifficulty
 		self.usageLimit = self.theBoard.dictionary.difficultyToUsage(theDifficulty)
+		(self.maxScored, self.maxSlots, self.timeShare, self.topMoves) = Player.searchBudget(theDifficulty)
+		self.numScored = 0
+		self.searchPool = None
+		self.searchCancelled = False
+		self.moveCache = collections.OrderedDict()
+		self.ponderState = None
+		self.slotWords = {}		#pattern -> words fitting it with the tray this turn, see tryFittingWords
+		self.exchangeChoice = None	#the tiles executeTurn chose to exchange instead of playing
+		self.lastLeave = None		#the letters kept last turn, see recordLeave
 		
-		print str(theDifficulty)+", "+str(self.usageLimit)
+		#search metrics, reset at the start of every turn
+		self.numValidations = 0
+		self.numRawValidations = 0
+		self.numPruned = 0
+		self.validationTime = 0
+		self.maxScore = -1
+		self.maxWordTimeStamp = 0
+		
+		print str(theDifficulty)+", "+str(self.usageLimit)+", "+str(100.0*self.theBoard.dictionary.vocabularyFraction(self.usageLimit))+" percent of words"
+		
+		self.moveGenerator = movegenerator.MoveGenerator(self.theBoard, self.theBoard.dictionary, self.usageLimit, Player.gaddag)
 		
 		if theHeuristic == None:
 			self.heuristic = heuristic.Heuristic()
@@ -132,12 +178,26 @@ class Player:
 	Puts the tray back in the bag, shuffles the bag and withdraws new tiles
 	'''		
 	def shuffle(self):
-		for tile in self.tray:
+		self.exchange(list(self.tray))
+		
+	'''
+	Puts the given tiles from the tray back in the bag, shuffles the bag and withdraws new tiles.
+	The new tiles are withdrawn first when the bag holds enough of them, so none of the tiles
+	given back is drawn again
+	'''
+	def exchange(self, tiles):
+		for tile in tiles:
+			self.tray.remove(tile)
+			
+		drawFirst = len(self.theBag.tiles) >= len(tiles)
+		if drawFirst:
+			self.grab()
+		for tile in tiles:
 			self.theBag.putBack(tile)
 		
-		self.tray = []
 		self.theBag.shuffle()
-		self.grab()
+		if not drawFirst:
+			self.grab()
 	
 	'''
 	Prototype for Draw Tray, it does nothing by default, but a Human player will draw
@@ -181,6 +241,663 @@ class Player:
 	
 	Algorithm description:
 		Since this is the heart of the AI, it deserves a brief description.
+		
+		By default the moves are generated from anchor squares (see movegenerator.py),
+		which walks the dictionary while placing tiles so that only placements spelling
+		real words are ever validated and scored. Setting ANCHOR_SEARCH to False falls
+		back to the original brute-force search over tile slots (see searchTileSlots).
+		
+		Each candidate is scored by the board and adjusted by the heuristic, and the
+		highest scoring one is placed on the board.
+		
+	'''	
+	def executeTurn(self, isFirstTurn, DISPLAYSURF):
+		
+		#Calculate turn execution time and output tray		
+		startTime = time.time()
+		if board.Board.DEBUG_ERRORS:
+			self.maxWordTimeStamp = startTime
+			self.validationTime = 0
+			self.theBoard.dictionary.resetLookupTime()
+			self.theBoard.resetAllMetrics()
+			print [tile.letter for tile in self.tray]
+			self.theWordsConsidered = ""
+			self.maxScore = -1
+				
+		self.numValidations = 0
+		self.numRawValidations = 0
+		self.numPruned = 0
+		
+		deadline = startTime + self.turnBudget(isFirstTurn)
+		if board.Board.DEBUG_ERRORS:
+			print "Time budget: "+str(deadline-startTime)+" seconds"
+		
+		pondered = self.collectPondering(isFirstTurn)
+		
+		cacheKey = self.positionKey(isFirstTurn)
+		if self.moveCache.has_key(cacheKey):
+			theMove = self.cachedMove(cacheKey)
+		else:
+			if Player.ANCHOR_SEARCH:
+				(maxPoints, maxTiles, maxBlanks) = self.searchAnchors(isFirstTurn, startTime, deadline, DISPLAYSURF, pondered)
+			else:
+				(maxPoints, maxTiles, maxBlanks) = self.searchTileSlots(isFirstTurn, startTime, deadline, DISPLAYSURF)
+			theMove = None
+			if maxTiles != None and maxTiles != []:
+				theMove = move.Move.fromPlacement(self.theBoard, maxTiles, maxBlanks, maxPoints)
+			self.cacheMove(cacheKey, theMove)
+			
+		#Exchanging part of the tray may be worth more than the best move
+		self.exchangeChoice = None
+		if self.exchangesTiles():
+			points = self.movePoints(theMove, isFirstTurn)
+			self.exchangeChoice = self.chooseExchange(theMove, points)
+			if self.exchangeChoice != None:
+				print "Exchanging: "+Player.leaveLetters(self.exchangeChoice)
+				theMove = None
+				points = 0
+			self.recordLeave(theMove, points)
+					
+		#Now we should have the best move so play it
+		if theMove != None:
+			maxTiles = self.placeTiles(theMove)
+			maxPoints = theMove.score
+			playedMove = True
+			
+			seedRatio = self.theBoard.calculateSeedRatio()
+			print "Seed Ratio: "+str(seedRatio)
+			
+			#Update statistics about the play made
+			if board.Board.DEBUG_ERRORS:
+				Player.aiStats.updateTiming(time.time()-startTime, self.maxWordTimeStamp-startTime)
+				lettersUsed = []
+				for pos, tile in maxTiles:
+					if tile.isBlank:
+						theLetter = "_"
+					else:
+						theLetter = tile.letter
+					lettersUsed.append(theLetter)
+				Player.aiStats.updateLetterPlays(lettersUsed, maxPoints)
+				Player.aiStats.updateSeedRatio(seedRatio, maxPoints)
+				Player.aiStats.save()
+			
+		#If there was truly NO move the computer could make, doesn't play anything
+		else:
+			playedMove = False
+			
+		if board.Board.DEBUG_ERRORS:
+			endTime = time.time()
+			timeSpent = endTime-startTime + .00001
+			percentValidating = 100.0 * self.validationTime / timeSpent
+			percentLookup = 100.0 * self.theBoard.dictionary.lookupTime / timeSpent
+			percentInitializing = 100.0 * self.initTime / timeSpent
+		
+			totalValidationTime = (self.theBoard.quickValidationTime + self.theBoard.crosswordValidationTime +
+									self.theBoard.dictionaryValidationTime + self.theBoard.scoringTime) + .00001
+			percentQuickValidation = self.theBoard.quickValidationTime / totalValidationTime
+			percentCrosswordValidation = self.theBoard.crosswordValidationTime / totalValidationTime
+			percentDictionaryValidation = self.theBoard.dictionaryValidationTime / totalValidationTime
+			percentScoring = self.theBoard.scoringTime / totalValidationTime
+		
+			print "AI: Wordsmith--Stats"
+			print "--------------------"
+			print "\t"+str(timeSpent)+" seconds required, of which,"
+			print "\t\t"+str(percentInitializing)+" percent was spent initializing seed positions."
+			print "\t\t"+str(percentValidating)+" percent was spent validating, in total."
+			print "\t\t"+str(percentLookup)+" percent was spent on dictionary lookups."
+			print "\t"+str(self.numSeeds)+" number of seed positions considered."
+			print "\t"+str(100.0*self.numValidations/(self.numRawValidations+1) - 100)+" percent complexity increase due to blanks."
+			print "\t"+str(self.numValidations)+" validations."
+			print "\t"+str(self.numValidations - self.theBoard.invalidWordCount)+" of those plays were possible."
+			print "\t"+str(self.theBoard.crosswordErrors)+" errors from invalid crossword formation."
+			print "\t"+str(1.0*self.numValidations/(self.numSlots+1))+" average validations per slot."
+			print "\t"+str(self.numSlots)+" slot sets considered."
+			print "\t"+str(100.0 * self.numEliminated/(self.numOriginalSlots + 0.00001))+" percent reduction by using trimming."
+			print "\t"+str(self.numPruned)+" slot sets skipped by their score bound."
+			print "\tValidation details:"
+			print "\t\tQuick validation: "+str(percentQuickValidation)
+			print "\t\tCrossword generation: "+str(percentCrosswordValidation)
+			print "\t\tDictionary validation: "+str(percentDictionaryValidation)
+			print "\t\tScoring: "+str(percentScoring)
+			print "--------------------"
+			#print "Considered the following main words, when making a choice"
+			#print self.theWordsConsidered
+			
+		return playedMove	 
+	
+	'''
+	Returns whether executeTurn weighs exchanging against the best move and records the leaves
+	for fitting their values. Not for a human, who is only given the best move as a hint (see
+	AI.exchangesTiles)
+	'''
+	def exchangesTiles(self):
+		return False
+		
+	'''
+	Returns the tiles to exchange instead of playing theMove (None if there's no move), or None
+	to play it. Each choice is valued by its points and what it leaves on the tray (see
+	leaveValue). Exchanging is only allowed while the bag holds a full tray, and once there is a
+	table of leave values.
+	
+	The points are those of the board alone (see movePoints): the leave values stand in for the
+	heuristic's adjustment, which would otherwise count the tiles kept (e.g. the tile quantile
+	heuristic's penalty for spending an S or a blank) a second time
+	'''
+	def chooseExchange(self, theMove, points):
+		if len(Player.leaveValues) == 0 or len(self.theBag.tiles) < Player.TRAY_SIZE or len(self.tray) == 0:
+			return None
+			
+		drawValue = self.drawValue()
+		(value, tiles) = self.bestExchange(drawValue)
+		if theMove != None:
+			leave = Player.leaveLetters(self.moveLeave(theMove))
+			if points + self.leaveValue(leave, drawValue) >= value:
+				return None
+		return tiles
+		
+	'''
+	Returns the points theMove scores on the board, without the heuristic's adjustment in its
+	score, 0 if there's no move
+	'''
+	def movePoints(self, theMove, isFirstTurn):
+		if theMove == None:
+			return 0
+		(points, spellings) = self.theBoard.validateMove(theMove, isFirstTurn, self.tray, self.usageLimit)
+		
+		#validating gave the blanks their letters, which they only keep once played
+		for t in self.tray:
+			if t.isBlank:
+				t.letter = ' '
+		return points
+		
+	'''
+	Tries every way of keeping part of the tray (the 127 smaller subsets of a full tray, fewer
+	when letters repeat) and returns the (value, tiles to give back) of the one leaving the most
+	'''
+	def bestExchange(self, drawValue):
+		best = None
+		leavesTried = {}
+		for keep in range(2 ** len(self.tray) - 1):
+			kept = [t for (i, t) in enumerate(self.tray) if (keep >> i) & 1 == 1]
+			leave = Player.leaveLetters(kept)
+			if leavesTried.has_key(leave):
+				continue
+			leavesTried[leave] = True
+			
+			value = self.leaveValue(leave, drawValue)
+			if best == None or value > best[0]:
+				best = (value, [t for t in self.tray if not t in kept])
+		return best
+		
+	'''
+	Returns what keeping the leave (as from leaveLetters) and drawing back up to a full tray is
+	worth in points over an average turn: its value in the fitted table (see
+	AIStats.fitLeaveValues), plus drawValue for every tile drawn. The value fitted to the length
+	of a leave isn't counted, as how many tiles were kept says more about the tray they were
+	kept from than about what was kept
+	'''
+	def leaveValue(self, leave, drawValue):
+		value = 0.0
+		for kind in aistats.AIStats.LEAVE_KINDS:
+			if kind == "length":
+				continue
+			for key in aistats.AIStats.leaveKeys(kind, leave):
+				value += Player.leaveValues.get(key, 0.0)
+		numDrawn = min(Player.TRAY_SIZE - len(leave), len(self.theBag.tiles))
+		return value + numDrawn * drawValue
+		
+	'''
+	Returns how much more a tile drawn now is worth than one drawn from a full bag, by the tile
+	values of the fitted table: the mean over the tiles not yet seen (those neither on the board
+	nor on the tray) less the mean over every tile
+	'''
+	def drawValue(self):
+		unseen = {}
+		for (letter, points, count) in bag.Bag.DISTRIBUTION:
+			unseen[letter] = count
+		for column in self.theBoard.squares:
+			for (boardTile, bonus) in column:
+				if boardTile != None:
+					unseen[' ' if boardTile.isBlank else boardTile.letter] -= 1
+		for t in self.tray:
+			unseen[' ' if t.isBlank else t.letter] -= 1
+			
+		def meanValue(counts):
+			total = 0.0
+			for (letter, count) in counts:
+				total += count * Player.leaveValues.get(("tile", '_' if letter == ' ' else letter), 0.0)
+			return total / max(sum([count for (letter, count) in counts]), 1)
+			
+		allTiles = [(letter, count) for (letter, points, count) in bag.Bag.DISTRIBUTION]
+		return meanValue(unseen.items()) - meanValue(allTiles)
+		
+	'''
+	Returns the tiles of the tray theMove doesn't use
+	'''
+	def moveLeave(self, theMove):
+		(tilesPlaced, blanks) = theMove.placement(self.theBoard, self.tray)
+		played = [t for (pos, t) in tilesPlaced]
+		return [t for t in self.tray if not t in played]
+		
+	'''
+	Returns the letters of the tiles as a leave: sorted, with '_' for a blank
+	'''
+	@staticmethod
+	def leaveLetters(tiles):
+		return "".join(sorted(['_' if t.isBlank else t.letter for t in tiles]))
+		
+	'''
+	Records the points of this turn's move (theMove, None if exchanging or passing, see movePoints)
+	against the letters kept last turn, for fitting the leave values, and remembers the letters
+	this turn keeps. Only turns starting from a full tray with a full tray left in the bag count
+	'''
+	def recordLeave(self, theMove, points):
+		if self.lastLeave != None:
+			Player.aiStats.updateLeavePlay(self.lastLeave, points)
+			
+		self.lastLeave = None
+		if len(self.tray) == Player.TRAY_SIZE and len(self.theBag.tiles) >= Player.TRAY_SIZE:
+			if theMove != None:
+				self.lastLeave = Player.leaveLetters(self.moveLeave(theMove))
+			elif self.exchangeChoice != None:
+				self.lastLeave = Player.leaveLetters([t for t in self.tray if not t in self.exchangeChoice])
+			else:
+				self.lastLeave = ""
+				
+	'''
+	Returns the key of the current position in the move cache: the board's Zobrist hash, the
+	letters on the tray (blanks as ' '), and everything else the search depends on (the
+	vocabulary, the first turn and, for the heuristic, whether the bag is running out)
+	'''
+	def positionKey(self, isFirstTurn):
+		rack = "".join(sorted([' ' if t.isBlank else t.letter for t in self.tray]))
+		return (self.theBoard.hash, rack, self.usageLimit, isFirstTurn, len(self.theBag.tiles))
+		
+	'''
+	Returns the move (a move.Move, None if there was no move) cached for a position which is in
+	the move cache, marking it as the most recently used
+	'''
+	def cachedMove(self, cacheKey):
+		theMove = self.moveCache.pop(cacheKey)
+		self.moveCache[cacheKey] = theMove
+		return theMove
+		
+	'''
+	Remembers the best move found for the position (None if there was none), evicting the least
+	recently used position once MOVE_CACHE_SIZE are remembered
+	'''
+	def cacheMove(self, cacheKey, theMove):
+		self.moveCache[cacheKey] = theMove
+		while len(self.moveCache) > Player.MOVE_CACHE_SIZE:
+			self.moveCache.popitem(last=False)
+		
+	'''
+	Picks the time budget of the turn in seconds, between MIN_TIME_BUDGET and TIMEOUT. Every
+	blank on the tray multiplies the moves to consider and so does every anchor of a more open
+	board, so those turns get more time, as does the end game (the bag running out), where
+	each move counts for more. The first turn has no anchors yet, only its blanks add time.
+	With FULL_TIME_FLOOR the hardest players (a time share of 1.0) keep the whole TIMEOUT every
+	turn, so they search as long as they did before there were turn budgets
+	'''
+	def turnBudget(self, isFirstTurn):
+		if Player.FULL_TIME_FLOOR and self.timeShare >= 1.0:
+			return Player.TIMEOUT
+			
+		budget = Player.MIN_TIME_BUDGET
+		if not isFirstTurn:
+			budget += 0.1 * len(self.theBoard.anchors)
+		for tile in self.tray:
+			if tile.isBlank:
+				budget *= 2
+		if len(self.theBag.tiles) < Player.TRAY_SIZE:
+			budget *= 1.5
+		return min(budget, Player.TIMEOUT) * self.timeShare
+		
+	'''
+	Returns the search budget (most moves scored, most anchors or tile slots searched, share of
+	the time budget, number of best moves to pick from) for the difficulty, from SEARCH_BUDGETS.
+	Easier players search less and play one of their few best moves, so they're both weaker and
+	cheaper to run than the hardest, which searches everything
+	'''
+	@staticmethod
+	def searchBudget(difficulty):
+		for (level, maxScored, maxSlots, timeShare, topMoves) in Player.SEARCH_BUDGETS:
+			if difficulty <= level:
+				return (maxScored, maxSlots, timeShare, topMoves)
+		return Player.SEARCH_BUDGETS[-1][1:]
+		
+	'''
+	True once the player has scored as many moves this turn as its budget allows
+	'''
+	def outOfBudget(self):
+		return self.maxScored != None and self.numScored >= self.maxScored
+		
+	'''
+	Returns the anchors or tile slots the budget allows searching: all of them, or a random
+	selection of them kept in their order
+	'''
+	def budgetSlots(self, slots):
+		if self.maxSlots == None or len(slots) <= self.maxSlots:
+			return slots
+		chosen = sorted(random.sample(range(len(slots)), self.maxSlots))
+		return [slots[i] for i in chosen]
+		
+	'''
+	Finds the best move by generating placements from every anchor square in both directions.
+	Every placement generated already spells a valid main word and valid crosswords, so the
+	board is only asked to score it. Returns the (points, tilesPlaced, blanks) of the best move
+	found before the deadline (a time.time() value). Anchors already pondered (see
+	collectPondering) aren't searched again. A player whose budget has it pick among its best
+	few moves plays one of them at random instead
+	'''
+	def searchAnchors(self, isFirstTurn, startTime, deadline, DISPLAYSURF, pondered = None):
+		
+		#a player with a limited budget picks one of its best few moves, and doesn't need workers
+		if self.topMoves > 1:
+			moves = self.generateMoves(isFirstTurn, self.topMoves, deadline)
+			if len(moves) == 0:
+				return (-1000, None, None)
+			(points, tilesPlaced, blanks, score, adjustment, words, leave) = random.choice(moves)
+			return (points, tilesPlaced, blanks)
+			
+		if Player.PARALLEL_WORKERS > 0 and self.maxScored == None:
+			return self.searchAnchorsParallel(isFirstTurn, startTime, deadline, DISPLAYSURF, pondered)
+		
+		(maxPoints, maxTiles, maxBlanks) = -1000, None, None
+		for (maxPoints, maxTiles, maxBlanks) in self.searchMoves(isFirstTurn, deadline, DISPLAYSURF, pondered):
+			pass
+		
+		return (maxPoints, maxTiles, maxBlanks)
+		
+	'''
+	Anytime version of the anchor search: a generator yielding (points, tilesPlaced, blanks) every
+	time a better move is found, so the caller always has the best move so far. The search ends
+	when every anchor is done, the deadline (a time.time() value, None for no limit) passes, the
+	caller stops iterating or cancelSearch is called (even before the first move is asked for),
+	all checked between moves. The best moves of anchors in pondered, a dict as returned by
+	collectPondering, are taken from it instead
+	'''
+	def searchMoves(self, isFirstTurn, deadline = None, DISPLAYSURF = None, pondered = None):
+		self.searchCancelled = False
+		self.numScored = 0
+		return self.improvingMoves(isFirstTurn, deadline, DISPLAYSURF, pondered)
+		
+	'''
+	The generator behind searchMoves, which sets the search up
+	'''
+	def improvingMoves(self, isFirstTurn, deadline, DISPLAYSURF, pondered):
+		startTime = time.time()
+		
+		anchors = self.reorderAnchors(self.budgetSlots(self.moveGenerator.findAnchors(isFirstTurn)))
+		
+		if board.Board.DEBUG_ERRORS:
+			self.initTime = time.time()-startTime
+			self.numSeeds = len(anchors)/2
+			self.numSlots = len(anchors)
+			self.numOriginalSlots = len(anchors)
+			self.numEliminated = 0
+			
+		maxPoints = -1000
+		progress = 0
+		totalProgress = len(anchors)
+		for (direction, anchor) in anchors:
+			progress += 1
+			
+			if DISPLAYSURF != None:
+				self.updateProgressBar(1.0*progress/totalProgress, DISPLAYSURF)
+				
+			if pondered != None and pondered.has_key((direction, anchor)):
+				best = pondered[(direction, anchor)]
+				if best != None and best[0] > maxPoints:
+					maxPoints = best[0]
+					yield best
+				continue
+				
+			(anchorPoints, numMoves) = (0, 0)
+			for (tilesPlaced, blanks) in self.moveGenerator.movesAt(direction, anchor, self.tray):
+				if self.searchCancelled or self.outOfBudget() or (deadline != None and time.time() > deadline):
+					return
+					
+				points = self.scorePlacement(isFirstTurn, tilesPlaced, blanks)
+				(anchorPoints, numMoves) = (max(anchorPoints, points), numMoves+1)
+				if points > maxPoints:
+					maxPoints = points
+					yield (points, tilesPlaced, blanks)
+					
+			if aistats.AIStats.COLLECT_WORD_DATA:
+				Player.aiStats.updateAnchorPlay(self.anchorFeatures(direction, anchor), anchorPoints, numMoves)
+					
+	'''
+	Stops a search running in searchMoves (e.g. from another thread) before its next move
+	'''
+	def cancelSearch(self):
+		self.searchCancelled = True
+		
+	'''
+	Runs the anchor search on a pool of worker processes (started on the first turn it's needed),
+	which all stop at the turn's deadline. The best move is the same one the serial search finds,
+	though ties between a pondered anchor and a searched one may go either way
+	'''
+	def searchAnchorsParallel(self, isFirstTurn, startTime, deadline, DISPLAYSURF, pondered = None):
+		anchors = self.reorderAnchors(self.moveGenerator.findAnchors(isFirstTurn))
+		
+		(ponderedPoints, ponderedTiles, ponderedBlanks) = (-1000, None, None)
+		if pondered != None:
+			for (direction, anchor) in anchors:
+				best = pondered.get((direction, anchor))
+				if best != None and best[0] > ponderedPoints:
+					(ponderedPoints, ponderedTiles, ponderedBlanks) = best
+			anchors = [a for a in anchors if not pondered.has_key(a)]
+		
+		if board.Board.DEBUG_ERRORS:
+			self.initTime = time.time()-startTime
+			self.numSeeds = len(anchors)/2
+			self.numSlots = len(anchors)
+			self.numOriginalSlots = len(anchors)
+			self.numEliminated = 0
+			
+		#the progress bar moves on as each worker finishes its share
+		def progress(fraction):
+			if DISPLAYSURF != None:
+				self.updateProgressBar(fraction, DISPLAYSURF)
+		theMove = self.getSearchPool().search(self.theBoard, self.tray, isFirstTurn, anchors, deadline, progress)
+		
+		if theMove == None or ponderedPoints > theMove.score:
+			return (ponderedPoints, ponderedTiles, ponderedBlanks)
+		(tilesPlaced, blanks) = theMove.placement(self.theBoard, self.tray)
+		return (theMove.score, tilesPlaced, blanks)
+		
+	'''
+	Returns the pool of worker processes, starting it the first time (with PARALLEL_WORKERS
+	workers, or a single one just for pondering)
+	'''
+	def getSearchPool(self):
+		if self.searchPool == None:
+			self.searchPool = parallelsearch.SearchPool(max(Player.PARALLEL_WORKERS, 1), self.difficulty, self.heuristic)
+		return self.searchPool
+		
+	'''
+	Stops pondering and the worker processes, to be called when the game is over. The pool is
+	started again if the player searches after all
+	'''
+	def closeSearchPool(self):
+		if self.searchPool != None:
+			self.searchPool.close()
+			self.searchPool = None
+		self.ponderState = None
+		
+	'''
+	Starts searching, in the worker processes, the board as it is for the player's next turn, to
+	be called when the opponent's turn begins. Neither the tray nor the lines of the board the
+	opponent doesn't play on change in the meantime, so the best moves found at their anchors
+	still hold when the turn comes (see collectPondering)
+	'''
+	def ponder(self):
+		if not Player.PONDER or self.maxScored != None or len(self.theBoard.anchors) == 0:
+			return
+			
+		anchors = self.moveGenerator.findAnchors(False)
+		self.getSearchPool().ponder(self.theBoard, self.tray, anchors)
+		
+		occupied = {}
+		for x in range(board.Board.GRID_SIZE):
+			for y in range(board.Board.GRID_SIZE):
+				if self.theBoard.squares[x][y][0] != None:
+					occupied[(x, y)] = True
+		crossWords = {}
+		crossScores = {}
+		for direction in (board.Board.ACROSS, board.Board.DOWN):
+			crossWords[direction] = dict(self.theBoard.crossWords[direction])
+			crossScores[direction] = dict(self.theBoard.crossScores[direction])
+		self.ponderState = (list(self.tray), occupied, crossWords, crossScores)
+		
+	'''
+	Stops pondering and returns the dict of (direction, anchor) -> (points, tilesPlaced, blanks),
+	or None where there was no move, of the anchors pondered whose line is unchanged since:
+	no new tile on it and the same perpendicular words next to it. Those anchors give the same
+	moves scoring the same points as before, anything else has to be searched again
+	'''
+	def collectPondering(self, isFirstTurn):
+		if self.ponderState == None:
+			return {}
+		(tray, occupied, crossWords, crossScores) = self.ponderState
+		self.ponderState = None
+		
+		results = self.searchPool.pondered()
+		if isFirstTurn or tray != self.tray:
+			return {}
+			
+		#lines are (direction, row) for words played across and (direction, column) for down
+		changed = {}
+		for x in range(board.Board.GRID_SIZE):
+			for y in range(board.Board.GRID_SIZE):
+				if self.theBoard.squares[x][y][0] != None and not occupied.has_key((x, y)):
+					changed[(board.Board.ACROSS, y)] = True
+					changed[(board.Board.DOWN, x)] = True
+		for direction in (board.Board.ACROSS, board.Board.DOWN):
+			squares = set(crossWords[direction].keys()) | set(self.theBoard.crossWords[direction].keys())
+			for (x, y) in squares:
+				if (crossWords[direction].get((x, y)) != self.theBoard.crossWords[direction].get((x, y)) or
+					crossScores[direction].get((x, y)) != self.theBoard.crossScores[direction].get((x, y))):
+					changed[(direction, y if direction == board.Board.ACROSS else x)] = True
+					
+		pondered = {}
+		for ((direction, (x, y)), best) in results.items():
+			if changed.has_key((direction, y if direction == board.Board.ACROSS else x)):
+				continue
+			if best == None:
+				pondered[(direction, (x, y))] = None
+			else:
+				(tilesPlaced, blanks) = best.placement(self.theBoard, self.tray)
+				pondered[(direction, (x, y))] = (best.score, tilesPlaced, blanks)
+		return pondered
+		
+	'''
+	Scores a placement which is already known to spell valid words, applying the blank letters
+	temporarily so the board can validate and score it, then adjusting by the heuristic
+	'''
+	def scorePlacement(self, isFirstTurn, tilesPlaced, blanks):
+		(score, adjustment, spellings) = self.evaluatePlacement(isFirstTurn, tilesPlaced, blanks)
+		return score + adjustment
+		
+	'''
+	Like scorePlacement, but returns the board score, the heuristic adjustment and the words
+	formed (None if the placement isn't valid) separately
+	'''
+	def evaluatePlacement(self, isFirstTurn, tilesPlaced, blanks):
+		
+		if board.Board.DEBUG_ERRORS:
+			startValidation = time.time()
+			self.numValidations += 1
+			self.numRawValidations += 1
+		self.numScored += 1
+		
+		i = 0
+		for pos, tile in tilesPlaced:
+			if tile.isBlank:
+				tile.letter = blanks[i]
+				i += 1
+		
+		#The board takes the tiles back off (resetting the blanks) once it has scored them
+		(score, spellings, seedRatio) = self.theBoard.validateWords(isFirstTurn, tilesPlayed=tilesPlaced, vocabulary = self.usageLimit)
+		
+		if board.Board.DEBUG_ERRORS:
+			self.validationTime += time.time()-startValidation
+		
+		adjustment = self.heuristic.adjust(trayTiles = self.tray, playTiles = tilesPlaced, seedRatio = seedRatio)
+		
+		if board.Board.DEBUG_ERRORS and score + adjustment > self.maxScore:
+			self.maxScore = score + adjustment
+			self.maxWordTimeStamp = time.time()
+			
+		return (score, adjustment, spellings)
+		
+	'''
+	Returns the k best distinct moves on the board for the tray, best first, as tuples of
+		(points, tilesPlaced, blanks, score, adjustment, words, leave)
+	where points is the board score plus the heuristic adjustment, words are the words formed
+	and leave is the letters left on the tray (' ' for a blank). Only the k best moves are kept
+	while searching. A move with the same points, words and leave as one already found (such as
+	a blank played on another square of the same word) is skipped, so callers see distinct plays. Moves with equal points keep the order the search found them in, so the
+	first is the move executeTurn would play. The search stops at the deadline (a time.time()
+	value) if one is given
+	'''
+	def generateMoves(self, isFirstTurn, k, deadline = None):
+		best = []	#min-heap of (points, -order, move), so the worst move kept comes off first
+		order = 0
+		found = set()	#(points, words, leave) of each move found so far
+		self.numScored = 0
+		startTime = time.time()
+		
+		anchors = self.reorderAnchors(self.budgetSlots(self.moveGenerator.findAnchors(isFirstTurn)))
+		
+		if board.Board.DEBUG_ERRORS:
+			self.initTime = time.time()-startTime
+			self.numSeeds = len(anchors)/2
+			self.numSlots = len(anchors)
+			self.numOriginalSlots = len(anchors)
+			self.numEliminated = 0
+			
+		for (direction, anchor) in anchors:
+			if self.outOfBudget() or (deadline != None and time.time() > deadline):
+				break
+				
+			for (tilesPlaced, blanks) in self.moveGenerator.movesAt(direction, anchor, self.tray):
+				if self.outOfBudget():
+					break
+				(score, adjustment, words) = self.evaluatePlacement(isFirstTurn, tilesPlaced, blanks)
+				if words == None:
+					continue
+					
+				leave = ""
+				for tile in self.tray:
+					if not tile in [t for (pos, t) in tilesPlaced]:
+						if tile.isBlank:
+							leave += ' '
+						else:
+							leave += tile.letter
+							
+				points = score + adjustment
+				#an equal move found earlier ranks above this one, so this could never be kept in its place
+				key = (points, tuple(words), leave)
+				if key in found:
+					continue
+				found.add(key)
+				
+				move = (points, tilesPlaced, blanks, score, adjustment, words, leave)
+				if len(best) < k:
+					heapq.heappush(best, (points, -order, move))
+				elif (points, -order) > best[0][:2]:
+					heapq.heapreplace(best, (points, -order, move))
+				order += 1
+				
+		best.sort(reverse = True)
+		return [move for (points, order, move) in best]
+	
+	'''
+	Finds the best move by brute force, returning the (points, tilesPlaced, blanks) of the best move.
+	
+	Algorithm description:
 		I'm starting out with a brute-force method before I look into whether
 		optimizations can be made because, if it doesn't take to long this algorithm
 		will correctly provide the highest scoring move.
@@ -201,51 +918,24 @@ class Player:
 			which tells us whether the move is correct and what score will result
 		
 	'''	
-	def executeTurn(self, isFirstTurn, DISPLAYSURF):
+	def searchTileSlots(self, isFirstTurn, startTime, deadline, DISPLAYSURF):
 		
-		#Calculate turn execution time and output tray		
-		startTime = time.time()
-		if board.Board.DEBUG_ERRORS:
-			self.maxWordTimeStamp = startTime
-			self.validationTime = 0
-			self.theBoard.dictionary.resetLookupTime()
-			self.theBoard.resetAllMetrics()
-			print [tile.letter for tile in self.tray]
-			self.theWordsConsidered = ""
-			self.maxScore = -1
-				
+		self.numScored = 0
+		
+		#The rack doesn't change during the search, so what it can spell is worked out up front
+		if Player.PATTERN_SEARCH:
+			self.slotWords = self.theBoard.dictionary.rackWords(self.rackLetters(), self.usageLimit)
 		
 		#STEP ONE: Create a list of seed positions
-		seeds = []
 		if isFirstTurn:
-			seeds.append((7,7)) #The seed has to be (7,7) for the first turn
+			seeds = [board.Board.START_POSITION] #The seed has to be (7,7) for the first turn
 		
 		else:	
-			#find all empty adjacent squares and add them to the list	
-			for x in range(board.Board.GRID_SIZE):
-				for y in range(board.Board.GRID_SIZE):
-					if self.theBoard.squares[x][y][0] != None:
-						#UP
-						if y > 0 and self.theBoard.squares[x][y-1][0] == None:
-							if not (x, y-1) in seeds:
-								seeds.append((x, y-1))
-						#DOWN
-						if y < board.Board.GRID_SIZE-1 and self.theBoard.squares[x][y+1][0] == None:
-							if not (x, y+1) in seeds:
-								seeds.append((x, y+1))
-						#LEFT
-						if x > 0 and self.theBoard.squares[x-1][y][0] == None:
-							if not (x-1, y) in seeds:
-								seeds.append((x-1, y))
-						#RIGHT
-						if x < board.Board.GRID_SIZE-1 and self.theBoard.squares[x-1][y][0] == None:
-							if not (x+1, y) in seeds:
-								seeds.append((x+1, y))
+			#all empty squares adjacent to a played tile, which the board keeps track of
+			seeds = sorted(self.theBoard.anchors.keys())
 		
 		#This will contain the best single-turn play possible						
-		(maxPoints, maxTiles) = -1000, None		
-		self.numValidations = 0
-		self.numRawValidations = 0
+		(maxPoints, maxTiles, maxBlanks) = -1000, None, None
 		
 		tileSlots = []				
 								
@@ -309,10 +999,25 @@ class Player:
 				tileSlotsMap[(x1,y1,x2,y2)] = True
 				i += 1
 				
-		tileSlots = self.reorderTileSlots(tileSlots)		
+		bingos = self.findBingos()
+		tileSlots = self.reorderTileSlots(self.budgetSlots(tileSlots), bingoFirst = len(bingos) > 0)
+		
+		#Search the slots best bound first, so we can stop as soon as no slot left can beat the best move,
+		#and the slots of equal bounds by the points expected from them
+		if Player.BRANCH_AND_BOUND:
+			bounded = [(self.slotBound(tileSlot), self.slotValue(self.slotFeatures(tileSlot)), tileSlot) for tileSlot in tileSlots]
+			bounded.sort(key = lambda entry: (entry[0], entry[1]), reverse = True)
+			bounds = [bound for (bound, value, tileSlot) in bounded]
+			tileSlots = [tileSlot for (bound, value, tileSlot) in bounded]
 				
 		if board.Board.DEBUG_ERRORS:
-			initTime = time.time()-startTime	
+			self.initTime = time.time()-startTime	
+			self.numSeeds = len(seeds)
+			self.numSlots = len(tileSlots)
+			self.numOriginalSlots = originalSize
+			self.numEliminated = numEliminated
+			if len(bingos) > 0:
+				print "Bingos: "+", ".join([word for (word, boardLetter) in bingos])
 			print "Considering: "	
 					
 		#Now tileSlots should contain all possible tile slots, from that seed position
@@ -331,229 +1036,463 @@ class Player:
 			
 			self.updateProgressBar(1.0*progress/totalProgress, DISPLAYSURF)
 			
-			timeSpent = time.time() - startTime
-			
-			if timeSpent > Player.TIMEOUT:
-				
+			if time.time() > deadline or self.outOfBudget():
+				break
 				
+			if Player.BRANCH_AND_BOUND and bounds[progress-1] <= maxPoints:
+				self.numPruned = totalProgress - progress + 1
 				break
 				
-			(points, tiles, blanks) = self.tryEverything(isFirstTurn, wordBuilt, emptySlots, self.tray)
+			if Player.PATTERN_SEARCH:
+				(points, tiles, blanks) = self.tryFittingWords(isFirstTurn, tileSlot)
+			else:
+				(points, tiles, blanks) = self.tryEverything(isFirstTurn, wordBuilt, emptySlots, self.tray)
 			if points > maxPoints:
 				(maxPoints, maxTiles, maxBlanks) = (points, tiles, blanks)
+			if aistats.AIStats.COLLECT_WORD_DATA:
+				Player.aiStats.updateSlotPlay(self.slotFeatures(tileSlot), max(points, 0))
 				
 					
-		#Now we should have the best tiles so play them
-		if maxTiles != None and maxTiles != []:
-			self.placeTiles(maxTiles, maxBlanks)
-			playedMove = True
-			
-			seedRatio = self.theBoard.calculateSeedRatio()
-			print "Seed Ratio: "+str(seedRatio)
-			
-			#Update statistics about the play made
-			if board.Board.DEBUG_ERRORS:
-				Player.aiStats.updateTiming(time.time()-startTime, self.maxWordTimeStamp-startTime)
-				lettersUsed = []
-				for pos, tile in maxTiles:
-					if tile.isBlank:
-						theLetter = "_"
-					else:
-						theLetter = tile.letter
-					lettersUsed.append(theLetter)
-				Player.aiStats.updateLetterPlays(lettersUsed, maxPoints)
-				Player.aiStats.updateSeedRatio(seedRatio, maxPoints)
-				Player.aiStats.save()
+		return (maxPoints, maxTiles, maxBlanks)
 			
-		#If there was truly NO move the computer could make, doesn't play anything
-		else:
-			playedMove = False
+	'''
+	Given a set of positions, this will try every possible combination of tray tiles that could be inserted
+	and return the score and tiles placed of the highest scoring combination by asking the board.
+	The combinations are tried by backtracking in place: the tiles placed, the tray tiles in use and
+	the letters of the word are kept in lists shared by every level of the search, and a placement
+	is only copied when it becomes the best one. The slots are filled left to right, so each tile
+	tried extends the start of the word, which is dropped as soon as no word begins that way
+	'''		
+	def tryEverything(self, isFirstTurn, word, slots, trayTiles):
+		
+		letters = []
+		previousSame = []	#index of the previous tray tile with the same letter, -1 if none
+		for tile in trayTiles:
+			if tile.isBlank:
+				letter = ' '
+			else:
+				letter = tile.letter
+			previous = -1
+			for i in range(len(letters)):
+				if letters[i] == letter:
+					previous = i
+			letters.append(letter)
+			previousSame.append(previous)
 			
-		if board.Board.DEBUG_ERRORS:
-			endTime = time.time()
-			timeSpent = endTime-startTime + .00001
-			percentValidating = 100.0 * self.validationTime / timeSpent
-			percentLookup = 100.0 * self.theBoard.dictionary.lookupTime / timeSpent
-			percentInitializing = 100.0 * initTime / timeSpent
+		#every (slot, tile) pair is made once, rather than every time a tile is tried in a slot
+		pairs = [[(slot, tile) for tile in trayTiles] for slot in slots]
 		
-			totalValidationTime = (self.theBoard.quickValidationTime + self.theBoard.crosswordValidationTime +
-									self.theBoard.dictionaryValidationTime + self.theBoard.scoringTime) + .00001
-			percentQuickValidation = self.theBoard.quickValidationTime / totalValidationTime
-			percentCrosswordValidation = self.theBoard.crosswordValidationTime / totalValidationTime
-			percentDictionaryValidation = self.theBoard.dictionaryValidationTime / totalValidationTime
-			percentScoring = self.theBoard.scoringTime / totalValidationTime
+		spelling = [None if tile == None else tile.letter for tile in word]
+		openIndices = [i for i in range(len(word)) if word[i] == None]
+		tilesPlaced = [None] * len(slots)
+		used = [False] * len(trayTiles)
+		best = [-1000, None, None]
 		
-			print "AI: Wordsmith--Stats"
-			print "--------------------"
-			print "\t"+str(timeSpent)+" seconds required, of which,"
-			print "\t\t"+str(percentInitializing)+" percent was spent initializing seed positions."
-			print "\t\t"+str(percentValidating)+" percent was spent validating, in total."
-			print "\t\t"+str(percentLookup)+" percent was spent on dictionary lookups."
-			print "\t"+str(len(seeds))+" number of seed positions considered."
-			print "\t"+str(100.0*self.numValidations/(self.numRawValidations+1) - 100)+" percent complexity increase due to blanks."
-			print "\t"+str(self.numValidations)+" validations."
-			print "\t"+str(self.numValidations - self.theBoard.invalidWordCount)+" of those plays were possible."
-			print "\t"+str(self.theBoard.crosswordErrors)+" errors from invalid crossword formation."
-			print "\t"+str(1.0*self.numValidations/(len(tileSlots)+1))+" average validations per slot."
-			print "\t"+str(len(tileSlots))+" slot sets considered."
-			print "\t"+str(100.0 * numEliminated/originalSize)+" percent reduction by using trimming."
-			print "\tValidation details:"
-			print "\t\tQuick validation: "+str(percentQuickValidation)
-			print "\t\tCrossword generation: "+str(percentCrosswordValidation)
-			print "\t\tDictionary validation: "+str(percentDictionaryValidation)
-			print "\t\tScoring: "+str(percentScoring)
-			print "--------------------"
-			#print "Considered the following main words, when making a choice"
-			#print self.theWordsConsidered
-			
-		return playedMove	 
+		#the board letters after each slot, up to the next slot or the end of the word
+		segments = []
+		for depth in range(len(openIndices)):
+			if depth+1 < len(openIndices):
+				end = openIndices[depth+1]
+			else:
+				end = len(word)
+			segments.append("".join(spelling[openIndices[depth]+1:end]))
 			
-	'''
-	Given a set of positions, this will try every possible combination of tray tiles that could be inserted
-	and return the score and tiles placed of the highest scoring combination by asking the board
-	'''		
-	def tryEverything(self, isFirstTurn, word, slots, trayTiles, tilesPlaced = []):
+		dictionary = self.theBoard.dictionary
+		nodes = dictionary.followPrefix([dictionary.root()], "".join(spelling[:openIndices[0]]), self.usageLimit)
+		if len(nodes) > 0:
+			self.fillSlots(isFirstTurn, 0, pairs, openIndices, segments, letters, previousSame, used, spelling, nodes, tilesPlaced, best)
+		return (best[0], best[1], best[2])
 		
-		#BASE CASE, we've placed every piece so validate and return the (score, tilesPlaced) tuple
-		if len(slots) == 0:
+	'''
+	Fills the slots from depth on with every combination of the unused tray tiles, keeping the
+	(score, tilesPlaced, blanks) of the best placement in best. Tiles with the same letter leave
+	the same tiles for the other slots, so the tray is treated as a multiset and only the first
+	unused tile of each letter is tried in a slot. The nodes are those the word up to the slot
+	reaches in the dictionary (several once a blank has been placed)
+	'''
+	def fillSlots(self, isFirstTurn, depth, pairs, openIndices, segments, letters, previousSame, used, spelling, nodes, tilesPlaced, best):
 		
-			if board.Board.DEBUG_ERRORS:	#Some quick metrics for analyzing the algorithm
-				startValidation = time.time()
+		#BASE CASE, we've placed every piece so validate it
+		if depth == len(tilesPlaced):
+			(score, blankAssignment) = self.scoreFilledSlots(isFirstTurn, "".join(spelling), tilesPlaced)
+			if score > best[0]:
+				best[0] = score
+				best[1] = tilesPlaced[:]
+				best[2] = blankAssignment
+			return
 			
-			blankAssignment = []
-			seedRatio = (-1, -1)
+		#RECURSIVE CASE: Try applying all possible tiles to the slot
+		for i in xrange(len(letters)):
+			if self.outOfBudget():
+				return
+			if used[i] or (previousSame[i] >= 0 and not used[previousSame[i]]):
+				continue
 				
-			#Before we go through complete validation, let's check the first word quickly for error
-			i = 0
-			spelling = ""
-			for tile in word:
+			#no word starts with the letters so far, so no tiles in the slots after it can help
+			nextNodes = self.theBoard.dictionary.followPrefix(nodes, letters[i] + segments[depth], self.usageLimit)
+			if len(nextNodes) == 0:
+				continue
 				
-				if tile != None:
-					spelling += tile.letter
-				else:
-					spelling += tilesPlaced[i][1].letter
-					i+=1
+			used[i] = True
+			tilesPlaced[depth] = pairs[depth][i]
+			spelling[openIndices[depth]] = letters[i]
+			self.fillSlots(isFirstTurn, depth+1, pairs, openIndices, segments, letters, previousSame, used, spelling, nextNodes, tilesPlaced, best)
+			used[i] = False
+			
+	'''
+	Validates and scores a placement filling every slot, given the spelling of its main word (blanks
+	as ' '), and returns its (score, blank letters)
+	'''
+	def scoreFilledSlots(self, isFirstTurn, spelling, tilesPlaced):
+	
+		if board.Board.DEBUG_ERRORS:	#Some quick metrics for analyzing the algorithm
+			startValidation = time.time()
+		self.numScored += 1
+		
+		blankAssignment = []
+		seedRatio = (-1, -1)
+			
+		#If there are no blanks, we can go right ahead and evaluate		
+		if not ' ' in spelling:		
+			if self.theBoard.dictionary.isValid(spelling, self.usageLimit):
+				if board.Board.DEBUG_ERRORS:
+					self.numValidations += 1
+					self.numRawValidations += 1
+					if self.numValidations % 10 == 0:
+						self.theWordsConsidered += "\n"
+					self.theWordsConsidered += spelling + ", "
+				(score, dummy, seedRatio) = self.theBoard.validateWords(isFirstTurn, tilesPlayed=tilesPlaced, vocabulary = self.usageLimit)
+			else:
+				score = -1000
+		
+		#Otherwise, we need to try to find a letter choice that works		
+		else:
+			#Get all blank assignments that correspond to real words
+			blankAssignments = self.theBoard.dictionary.matchWithBlanks(spelling, vocabulary = self.usageLimit)
+		
+			rawValidation = 0
+		
+			if len(blankAssignments) > 0:
+				for assignment in blankAssignments:
+					
+					#Apply the assignment to the blanks
+					i = 0
+					assignedSpelling = ''
+					for (x, y), tile in tilesPlaced:
+						if tile.isBlank:
+							tile.letter = assignment[i]
+							i += 1
+						assignedSpelling += tile.letter
 					
-			#If there are no blanks, we can go right ahead and evaluate		
-			if not ' ' in spelling:		
-				if self.theBoard.dictionary.isValid(spelling, self.usageLimit) or len(slots) == 1:
 					if board.Board.DEBUG_ERRORS:
 						self.numValidations += 1
-						self.numRawValidations += 1
+						rawValidation = 1
 						if self.numValidations % 10 == 0:
 							self.theWordsConsidered += "\n"
-						self.theWordsConsidered += spelling + ", "
+						self.theWordsConsidered += assignedSpelling + ", "
+						
 					(score, dummy, seedRatio) = self.theBoard.validateWords(isFirstTurn, tilesPlayed=tilesPlaced, vocabulary = self.usageLimit)
-				else:
-					score = -1000
+					
+					#We only need the first word that works, all others will have the same points
+					if score > 0:
+						blankAssignment = assignment
+						break
+						
+			#No blank assignments validated the principle word
+			else:
+				score = -1000
+				
+			if board.Board.DEBUG_ERRORS:
+				self.numRawValidations += rawValidation
+				
+		if board.Board.DEBUG_ERRORS:
+			endValidation = time.time()
+			self.validationTime += endValidation-startValidation
+			
+		score += self.heuristic.adjust(trayTiles = self.tray, playTiles = tilesPlaced, seedRatio = seedRatio)	
 			
-			#Otherwise, we need to try to find a letter choice that works		
+		if score > self.maxScore:
+			self.maxScore = score
+			self.maxWordTimeStamp = time.time()
+	
+		return (score, blankAssignment)
+		
+	'''
+	Scores only the words the dictionary says fit the tile slot with the tray's tiles, instead of
+	every ordering of the tray, and returns the (score, tilesPlaced, blanks) of the best one
+	'''
+	def tryFittingWords(self, isFirstTurn, tileSlot):
+		pattern = ""
+		for pos, tile in tileSlot:
+			if tile == None:
+				pattern += dictionarywords.DictionaryWords.OPEN
 			else:
-				#Get all blank assignments that correspond to real words
-				blankAssignments = self.theBoard.dictionary.matchWithBlanks(spelling, vocabulary = self.usageLimit)
+				pattern += tile.letter
+				
+		(maxScore, maxTiles, maxBlanks) = (-1000, None, None)
+		#Many slots share a pattern, so the words fitting each one are only looked up once a turn
+		words = self.slotWords.get(pattern)
+		if words == None:
+			words = self.theBoard.dictionary.wordsFitting(pattern, self.rackLetters(), vocabulary = self.usageLimit)
+			self.slotWords[pattern] = words
 			
-				rawValidation = 0
+		for (word, blankIndices) in words:
+			if self.outOfBudget():
+				break
 			
-				if len(blankAssignments) > 0:
-					for assignment in blankAssignments:
-						
-						#Apply the assignment to the blanks
-						i = 0
-						assignedSpelling = ''
-						for (x, y), tile in tilesPlaced:
-							if tile.isBlank:
-								tile.letter = assignment[i]
-								i += 1
-							assignedSpelling += tile.letter
-						
-						if board.Board.DEBUG_ERRORS:
-							self.numValidations += 1
-							rawValidation = 1
-							if self.numValidations % 10 == 0:
-								self.theWordsConsidered += "\n"
-							self.theWordsConsidered += assignedSpelling + ", "
-							
-						(score, dummy, seedRatio) = self.theBoard.validateWords(isFirstTurn, tilesPlayed=tilesPlaced, vocabulary = self.usageLimit)
-						
-						#We only need the first word that works, all others will have the same points
-						if score > 0:
-							blankAssignment = assignment
+			#Take the tiles spelling the word off a copy of the tray
+			trayRemaining = self.tray[:]
+			tilesPlaced = []
+			blanks = []
+			i = 0
+			for pos, tile in tileSlot:
+				if tile == None:
+					for t in trayRemaining:
+						if t.isBlank == (i in blankIndices) and (t.isBlank or t.letter == word[i]):
 							break
-							
-				#No blank assignments validated the principle word
-				else:
-					score = -1000
-					
-				if board.Board.DEBUG_ERRORS:
-					self.numRawValidations += rawValidation
-					
-			if board.Board.DEBUG_ERRORS:
-				endValidation = time.time()
-				self.validationTime += endValidation-startValidation
+					trayRemaining.remove(t)
+					tilesPlaced.append((pos, t))
+					if t.isBlank:
+						blanks.append(word[i])
+				i += 1
 				
-			score += self.heuristic.adjust(trayTiles = self.tray, playTiles = tilesPlaced, seedRatio = seedRatio)	
+			score = self.scorePlacement(isFirstTurn, tilesPlaced, blanks)
+			if score > maxScore:
+				(maxScore, maxTiles, maxBlanks) = (score, tilesPlaced, blanks)
 				
-			if score > self.maxScore:
-				self.maxScore = score
-				self.maxWordTimeStamp = time.time()
+		return (maxScore, maxTiles, maxBlanks)
 		
-			return (score, tilesPlaced, blankAssignment)
-		
-		#RECURSIVE CASE: Try applying all possible tiles to the slot, return the maximimum score
+	'''
+	Returns an upper bound on the score (heuristic adjustment included) of any play filling the
+	tile slot: the best tray tiles on its best letter bonuses, every word bonus of its empty squares
+	applied to the main word and to each crossword, and the bingo bonus for using the whole tray
+	'''
+	def slotBound(self, tileSlot):
+		emptySlots = [pos for (pos, tile) in tileSlot if tile == None]
+		if len(emptySlots) > len(self.tray):
+			return -1000
+			
+		#A single square may make a word in either direction, the crossword covers the other one
+		if len(tileSlot) > 1 and tileSlot[0][0][1] == tileSlot[1][0][1]:
+			direction = board.Board.ACROSS
+			(dx, dy) = (1, 0)
+		elif len(tileSlot) > 1:
+			direction = board.Board.DOWN
+			(dx, dy) = (0, 1)
 		else:
-			slot = slots[0]
-			(maxScore, maxTiles, maxBlanks) = (-1000, None, None)
-			for tile in trayTiles:
-				newTilesPlaced = tilesPlaced[:]
-				newTilesPlaced.append((slot, tile))
-				trayRemaining = trayTiles[:]
-				trayRemaining.remove(tile)
-				(score, tilesTried, blankAssignment) = self.tryEverything(isFirstTurn, word, slots[1:], trayRemaining, newTilesPlaced)
-				if score > maxScore:
-					maxScore, maxTiles, maxBlanks = score, tilesTried, blankAssignment
-			return (maxScore, maxTiles, maxBlanks)
-	
+			direction = board.Board.ACROSS
+			(dx, dy) = (1, 0)
+			
+		squares = self.theBoard.squares
+		size = board.Board.GRID_SIZE
+		
+		#The main word takes in every tile on the line touching the slot
+		fixedPoints = 0
+		for (pos, tile) in tileSlot:
+			if tile != None:
+				fixedPoints += tile.points
+		(x, y) = tileSlot[0][0]
+		x, y = x-dx, y-dy
+		while x >= 0 and y >= 0 and squares[x][y][0] != None:
+			fixedPoints += squares[x][y][0].points
+			x, y = x-dx, y-dy
+		(x, y) = tileSlot[-1][0]
+		x, y = x+dx, y+dy
+		while x < size and y < size and squares[x][y][0] != None:
+			fixedPoints += squares[x][y][0].points
+			x, y = x+dx, y+dy
+			
+		trayPoints = sorted([tile.points for tile in self.tray], reverse = True)
+		letterBonuses = []
+		wordBonus = 1
+		crossBound = 0
+		for (x, y) in emptySlots:
+			(letterBonus, squareWordBonus) = self.squareBonuses(squares[x][y][1])
+			letterBonuses.append(letterBonus)
+			wordBonus *= squareWordBonus
+			crossScore = self.theBoard.crossScores[direction].get((x, y))
+			if crossScore != None:
+				crossBound += (crossScore + trayPoints[0] * letterBonus) * squareWordBonus
+		letterBonuses.sort(reverse = True)
+		
+		mainPoints = fixedPoints
+		for i in range(len(emptySlots)):
+			mainPoints += trayPoints[i] * letterBonuses[i]
+			
+		bound = mainPoints * wordBonus + crossBound
+		if len(emptySlots) == Player.TRAY_SIZE:
+			bound += 50
+		return bound + self.heuristic.maxAdjust(self.tray, len(emptySlots))
+		
 	'''
-	Reorders the tile slots so as to (hopefully) find the max word earlier in the data processing so
-	that if we time out the function arbitrarily, we'll get better results
+	Returns the (letter multiplier, word multiplier) of a square bonus
 	'''
-	def reorderTileSlots(self, tileSlots):
-		# We'll counting sort the tileSlots by # of empty slots
-		# i.e. orderedBySlots[3] = all tileSlots with 3 empty slots
-		orderedBySlots = [[] for i in range(Player.TRAY_SIZE+1)]
+	def squareBonuses(self, bonus):
+		if bonus == board.Board.DOUBLELETTER:
+			return (2, 1)
+		elif bonus == board.Board.TRIPLELETTER:
+			return (3, 1)
+		elif bonus == board.Board.DOUBLEWORD:
+			return (1, 2)
+		elif bonus == board.Board.TRIPLEWORD:
+			return (1, 3)
+		return (1, 1)
 		
+	'''
+	Orders the tile slots by the points expected from them, looked up by their features in the
+	table fitted from recorded games (see AIStats.fitSlotValues), so the best move tends to be
+	found early. If bingoFirst, the slots using the whole tray come first. This is the order of
+	the search without BRANCH_AND_BOUND; with it, slots go best bound first and the expected
+	points only order slots of equal bounds (see searchTileSlots)
+	'''
+	def reorderTileSlots(self, tileSlots, bingoFirst = False):
+		ranked = []
 		for tileSlot in tileSlots:
-			i = 0
-			for pos, slot in tileSlot:
-				if slot == None:
-					i += 1
-			assert i < len(orderedBySlots)	
-			orderedBySlots[i].append(tileSlot)
-		
-		newTileSlots = []	
-		for ranking in orderedBySlots:
-			if len(ranking) > 0:
-				for tileSlot in ranking:
-					newTileSlots.append(tileSlot)
-					
-		return newTileSlots
+			features = self.slotFeatures(tileSlot)
+			usesTray = bingoFirst and features[0] == len(self.tray)
+			ranked.append((usesTray, self.slotValue(features), tileSlot))
+			
+		#the sort is stable, so slots of equal value stay in the order they were found
+		ranked.sort(key = lambda entry: (entry[0], entry[1]), reverse = True)
+		return [tileSlot for (usesTray, value, tileSlot) in ranked]
 		
 	'''
-	Given a set of tiles, this will automatically apply the tiles to the board as tentative pieces
-	and remove them from the AI's tray
+	Returns the points expected from a tile slot with the features (see slotFeatures), from the
+	fitted table. Features the table hasn't seen get the mean for their number of empty squares
 	'''
-	def placeTiles(self, tiles, blanks):
+	def slotValue(self, features):
+		value = Player.slotValues.get(features)
+		if value == None:
+			value = Player.slotValues.get(features[0], 0)
+		return value
 		
-		i = 0
-		for (pos, tile) in tiles:
+	'''
+	Orders the anchors (as (direction, anchor) from MoveGenerator.findAnchors) by the best points
+	expected per move generated at them, looked up by their features in the table fitted from
+	recorded games (see AIStats.fitAnchorValues), so a search stopped by its deadline or budget
+	has most likely been through the best moves. Ranking by points alone puts the open anchors
+	with the most moves to score first, which finds the best move later than the board's own
+	order. Anchors of equal value stay in the order they were found
+	'''
+	def reorderAnchors(self, anchors):
+		if len(Player.anchorValues) == 0:
+			return anchors
+		ranked = []
+		for (direction, anchor) in anchors:
+			features = self.anchorFeatures(direction, anchor)
+			value = Player.anchorValues.get(features)
+			if value == None:
+				value = Player.anchorValues.get(features[0], 0)
+			ranked.append((value, (direction, anchor)))
+		ranked.sort(key = lambda entry: entry[0], reverse = True)
+		return [entry[1] for entry in ranked]
+		
+	'''
+	Returns the features of an anchor the anchor values are keyed by: those (see slotFeatures) of
+	the tile slot running from it in its direction over a full tray of empty squares, taking in
+	the tiles on the board just before it and along the way
+	'''
+	def anchorFeatures(self, direction, (x, y)):
+		if direction == board.Board.ACROSS:
+			(dx, dy) = (1, 0)
+		else:
+			(dx, dy) = (0, 1)
+		squares = self.theBoard.squares
+		size = board.Board.GRID_SIZE
+		
+		tileSlot = []
+		(i, j) = (x-dx, y-dy)
+		while i >= 0 and j >= 0 and squares[i][j][0] != None:
+			tileSlot.insert(0, ((i, j), squares[i][j][0]))
+			(i, j) = (i-dx, j-dy)
 			
-			if tile.isBlank and blanks != None and i < len(blanks):
-				tile.letter = blanks[i]
-				i+=1
+		(i, j) = (x, y)
+		numEmpty = 0
+		while i < size and j < size and numEmpty < len(self.tray):
+			tileSlot.append(((i, j), squares[i][j][0]))
+			numEmpty += 1
+			(i, j) = (i+dx, j+dy)
+			while i < size and j < size and squares[i][j][0] != None:
+				tileSlot.append(((i, j), squares[i][j][0]))
+				(i, j) = (i+dx, j+dy)
+		return self.slotFeatures(tileSlot)
+		
+	'''
+	Returns the features of a tile slot the slot values are keyed by: its number of empty squares,
+	how many of those are word bonuses, letter bonuses and squares making crosswords (each capped
+	at 2), and 1 if it runs through tiles already on the board, 0 if not
+	'''
+	def slotFeatures(self, tileSlot):
+		if len(tileSlot) > 1 and tileSlot[0][0][1] == tileSlot[1][0][1]:
+			directions = (board.Board.ACROSS,)
+		elif len(tileSlot) > 1:
+			directions = (board.Board.DOWN,)
+		else:
+			directions = (board.Board.ACROSS, board.Board.DOWN)
+			
+		numEmpty = 0
+		wordBonuses = 0
+		letterBonuses = 0
+		crossWords = 0
+		for ((x, y), tile) in tileSlot:
+			if tile == None:
+				numEmpty += 1
+				bonus = self.theBoard.squares[x][y][1]
+				if bonus == board.Board.DOUBLEWORD or bonus == board.Board.TRIPLEWORD:
+					wordBonuses += 1
+				elif bonus == board.Board.DOUBLELETTER or bonus == board.Board.TRIPLELETTER:
+					letterBonuses += 1
+				for direction in directions:
+					if self.theBoard.crossWords[direction].has_key((x, y)):
+						crossWords += 1
+						break
 						
-			self.theBoard.setPiece(pos,tile)
+		throughTiles = 0
+		if numEmpty < len(tileSlot):
+			throughTiles = 1
+		return (numEmpty, min(wordBonuses, 2), min(letterBonuses, 2), min(crossWords, 2), throughTiles)
+		
+	'''
+	Returns the bingos a full tray could play, from the tray alone or through a letter already
+	on the board, as (word, boardLetter) pairs (see DictionaryWords.bingos)
+	'''
+	def findBingos(self):
+		if len(self.tray) < Player.TRAY_SIZE:
+			return []
+		
+		boardLetters = ""
+		for x in range(board.Board.GRID_SIZE):
+			for y in range(board.Board.GRID_SIZE):
+				tile = self.theBoard.squares[x][y][0]
+				if tile != None and tile.letter not in boardLetters:
+					boardLetters += tile.letter
+					
+		return self.theBoard.dictionary.bingos(self.rackLetters(), boardLetters, self.usageLimit)
+		
+	'''
+	Returns the letters on the tray as a string, with ' ' for each blank
+	'''
+	def rackLetters(self):
+		rack = ""
+		for tile in self.tray:
+			if tile.isBlank:
+				rack += ' '
+			else:
+				rack += tile.letter
+		return rack
+		
+	'''
+	Given a move, this will automatically apply its tiles to the board as tentative pieces
+	and remove them from the AI's tray, returning them as ((x, y), tile)
+	'''
+	def placeTiles(self, theMove):
+		
+		tilesPlaced = self.theBoard.applyMove(theMove, self.tray)
+		assert tilesPlaced != None, "The tray doesn't hold the tiles of "+str(theMove)
+		for (pos, tile) in tilesPlaced:
 			tile.pulse()
 			self.tray.remove(tile)
+		return tilesPlaced
 					
 			
 	'''
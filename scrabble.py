@@ -65,6 +65,9 @@ SCORE_COLOR = (55, 46, 40)
 #GAME MODES
 TRAINING_FLAG = False #With this set to true, entering training mode causes the AI to play against
 					  #itself automatically
+PONDER_FLAG = False	  #With this set to true, the AI searches while the player thinks, in a worker process
+					  #forked from the game once the display is up (which isn't safe on every platform)
+player.Player.PONDER = PONDER_FLAG
 					
 if TRAINING_FLAG:
 	TIC.set_volume(0.0)
@@ -157,6 +160,7 @@ def runGame(USERDATA, useHintBox = False):
 		
 		for event in pygame.event.get():
 			if event.type == QUIT:
+				stopSearching(players)
 				pygame.quit()
 				sys.exit()
 			elif event.type == MOUSEMOTION:
@@ -222,6 +226,8 @@ def runGame(USERDATA, useHintBox = False):
 					#If we were stuck before, we aren't anymore
 					if computerTurn:
 						AIstuck = False					
+					else:
+						startPondering(players)
 				else:
 					if TRAINING_FLAG:
 						AIstuck = True
@@ -229,7 +235,10 @@ def runGame(USERDATA, useHintBox = False):
 					if computerTurn:
 						print "AI thinks it has a good move, but it doesn't"
 			else:
-				players[active].shuffle()
+				if players[active].exchangeChoice != None:
+					players[active].exchange(players[active].exchangeChoice)
+				else:
+					players[active].shuffle()
 				#Let the player know the AI shuffled
 				players[active].lastScore = 0
 				players[active].pulseScore()
@@ -240,6 +249,8 @@ def runGame(USERDATA, useHintBox = False):
 				if active >= len(players):
 					active = 0
 				computerTurn = isinstance(players[active], ai.AI)
+				if not computerTurn:
+					startPondering(players)
 
 			redrawEverything(theBoard, players[active], players, gameOver, gameMenu)	
 			
@@ -267,7 +278,25 @@ def runGame(USERDATA, useHintBox = False):
 
 		redrawNecessary(theBoard, players, gameOver)		
 		pygame.display.update()
+		
+	#the game is over (or left), so nobody will collect what the computer players ponder
+	stopSearching(players)
 ##===============================================
+'''
+Lets every computer player search for its next move while a human is thinking
+'''
+def startPondering(players):
+	for p in players:
+		if isinstance(p, ai.AI):
+			p.ponder()
+			
+'''
+Stops the worker processes of every computer player, pondering or not
+'''
+def stopSearching(players):
+	for p in players:
+		p.closeSearchPool()
+			
 '''
 This resolves the action of the player to try to pick up a tile. Two situations:
 1) The player has a piece in hand:
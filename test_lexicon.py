@@ -0,0 +1,165 @@
+'''
+Tests for the lexicons built from the word list: the DAWG behind DictionaryWords and the
+GADDAG behind the move generator, and the compiled lexicon files they're saved in. Run with python -m unittest test_lexicon
+
+They use every SAMPLE-th word of media/scrabblewords_usage.txt, so they run in a few seconds,
+and the words left out of the sample are checked not to be found.
+'''
+
+import unittest, os, shutil, tempfile, array, dawg, gaddag, lexiconfile
+
+WORD_LIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'media', 'scrabblewords_usage.txt')
+SAMPLE = 50
+
+'''
+Returns (sample, others): every SAMPLE-th word of the word list and a few of the words between them
+'''
+def readWords():
+	sample = []
+	others = []
+	with open(WORD_LIST, 'r') as dictFile:
+		for (i, line) in enumerate(dictFile):
+			tokens = line.split()
+			if len(tokens) == 0:
+				continue
+			if i % SAMPLE == 0:
+				sample.append(tokens[0])
+			elif i % SAMPLE == SAMPLE/2:
+				others.append(tokens[0])
+	return (sample, others)
+
+class DawgTest(unittest.TestCase):
+
+	def setUp(self):
+		(self.words, self.others) = readWords()
+		self.dawg = dawg.Dawg(self.words)
+
+	def testContainsEveryWord(self):
+		for (rank, word) in enumerate(self.words):
+			self.assertEqual(self.dawg.index(word), rank)
+
+	def testRejectsOtherWords(self):
+		for word in self.others:
+			self.assertEqual(self.dawg.index(word), -1)
+		known = set(self.words)
+		for word in self.words:
+			if not word[:-1] in known:
+				self.assertEqual(self.dawg.index(word[:-1]), -1)
+
+	def testRanksAndStrings(self):
+		self.assertEqual(self.dawg.size(), len(self.words))
+		self.assertEqual(list(self.dawg.strings()), self.words)
+		for rank in range(0, len(self.words), 7):
+			self.assertEqual(self.dawg.string(rank), self.words[rank])
+
+	def testUsesLoadedArrays(self):
+		copy = dawg.Dawg()
+		copy.useArrays(self.dawg.arrays('copy.'), 'copy.')
+		self.assertEqual(list(copy.strings()), self.words)
+
+class GaddagTest(unittest.TestCase):
+
+	def setUp(self):
+		(self.words, self.others) = readWords()
+		self.directory = tempfile.mkdtemp()
+		self.filename = os.path.join(self.directory, 'words.txt')
+		with open(self.filename, 'w') as outfile:
+			for word in self.words:
+				outfile.write(word + '\n')
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def testContainsEveryWord(self):
+		theGaddag = gaddag.Gaddag(self.filename)
+		for word in self.words:
+			self.assertTrue(theGaddag.contains(word), word)
+		for word in self.others:
+			self.assertFalse(theGaddag.contains(word), word)
+
+	def testEveryPathOfAWord(self):
+		theGaddag = gaddag.Gaddag(self.filename)
+		for word in self.words[::20]:
+			for i in range(len(word)):
+				path = word[i::-1] + gaddag.Gaddag.SEPARATOR + word[i+1:]
+				self.assertTrue(theGaddag.index(path) >= 0, path)
+
+	def testCompiledGaddagMatches(self):
+		built = gaddag.Gaddag(self.filename)
+		self.assertTrue(os.path.exists(os.path.join(self.directory, 'words' + gaddag.Gaddag.COMPILED_EXTENSION)))
+		loaded = gaddag.Gaddag(self.filename)
+		self.assertEqual(loaded.size(), built.size())
+		for word in self.words:
+			self.assertTrue(loaded.contains(word), word)
+
+class LexiconFileTest(unittest.TestCase):
+
+	VERSION = 3
+
+	def setUp(self):
+		self.directory = tempfile.mkdtemp()
+		self.source = os.path.join(self.directory, 'words.txt')
+		self.filename = os.path.join(self.directory, 'words.lex')
+		with open(self.source, 'w') as outfile:
+			outfile.write('CAT\nDOG\n')
+		self.arrays = {'counts': array.array('i', [5, -7, 1 << 30]),
+					   'flags': array.array('b', [1, 0, -1, 127]),
+					   'letters': 'CATDOG'}
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+
+	def save(self):
+		self.assertTrue(lexiconfile.LexiconFile.save(self.filename, self.source, self.arrays, LexiconFileTest.VERSION))
+
+	def load(self):
+		return lexiconfile.LexiconFile.load(self.filename, self.source, LexiconFileTest.VERSION)
+
+	def testRoundTrip(self):
+		self.save()
+		loaded = self.load()
+		self.assertEqual(sorted(loaded.keys()), sorted(self.arrays.keys()))
+		self.assertEqual(list(loaded['counts']), list(self.arrays['counts']))
+		self.assertEqual(list(loaded['flags']), list(self.arrays['flags']))
+		self.assertEqual(loaded['letters'], 'CATDOG')
+
+	def testMissingFile(self):
+		self.assertEqual(self.load(), None)
+
+	def testOtherVersion(self):
+		self.save()
+		self.assertEqual(lexiconfile.LexiconFile.load(self.filename, self.source, LexiconFileTest.VERSION+1), None)
+
+	def testNotALexicon(self):
+		with open(self.filename, 'wb') as outfile:
+			outfile.write('CAT\nDOG\n' * 20)
+		self.assertEqual(self.load(), None)
+
+	def testStaleWhenSourceChanges(self):
+		self.save()
+		stat = os.stat(self.source)
+		with open(self.source, 'w') as outfile:
+			outfile.write('COT\nDOG\n')		#the same size, only the contents differ
+		os.utime(self.source, (stat.st_atime, stat.st_mtime + 10))
+		self.assertEqual(self.load(), None)
+
+	def testStaleWhenSourceGrows(self):
+		self.save()
+		with open(self.source, 'a') as outfile:
+			outfile.write('EMU\n')
+		self.assertEqual(self.load(), None)
+
+	def testFreshWhenSourceIsOnlyTouched(self):
+		self.save()
+		stat = os.stat(self.source)
+		os.utime(self.source, (stat.st_atime, stat.st_mtime + 10))
+		self.assertNotEqual(self.load(), None)
+
+		#the new mtime is recorded, so the source isn't hashed again
+		header = lexiconfile.LexiconFile.HEADER
+		with open(self.filename, 'rb') as infile:
+			(magic, version, byteOrder, mtime, size, digest, numArrays) = header.unpack(infile.read(header.size))
+		self.assertEqual(mtime, os.stat(self.source).st_mtime)
+
+if __name__ == '__main__':
+	unittest.main()
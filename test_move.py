@@ -0,0 +1,78 @@
+'''
+Tests for the Move value type. Run with python -m unittest test_move
+'''
+
+import unittest, pickle, move
+
+'''
+Stands in for a tile.Tile, which needs pygame to load its images
+'''
+class TrayTile:
+
+	def __init__(self, letter, isBlank = False):
+		self.letter = letter
+		self.isBlank = isBlank
+
+'''
+Stands in for a board.Board: only the squares are used, as [x][y] -> (tile, bonus)
+'''
+class SquaresBoard:
+
+	def __init__(self, size = 15):
+		self.squares = [[(None, None) for y in range(size)] for x in range(size)]
+
+	def put(self, (x, y), letter):
+		self.squares[x][y] = (TrayTile(letter), None)
+
+class MoveTest(unittest.TestCase):
+
+	def testEncodeRoundTrip(self):
+		for m in [move.Move((7, 7), move.Move.ACROSS, "QUIXOTIC", 0, 92.0),
+				  move.Move((0, 14), move.Move.DOWN, "ZA", 0b10, 11.0),
+				  move.Move((3, 0), move.Move.ACROSS, "RETAINERS", 0b100000001, 61.5),
+				  move.Move((0, 0), move.Move.DOWN, "ABCDEFGHIJKLMNOP", 0xFFFF, -3.25)]:
+			data = m.encode()
+			self.assertEqual(len(data), move.Move.ENCODING.size + len(m.word))
+			self.assertEqual(move.Move.decode(data), m)
+
+	def testHeaderSize(self):
+		self.assertEqual(move.Move.ENCODING.size, 13)
+
+	def testEqualityAndHash(self):
+		m = move.Move((7, 7), move.Move.ACROSS, "CAT", 0b001, 5.0)
+		self.assertEqual(m, move.Move((7, 7), move.Move.ACROSS, "CAT", 0b001, 5.0))
+		self.assertEqual(hash(m), hash(move.Move((7, 7), move.Move.ACROSS, "CAT", 0b001, 5.0)))
+		self.assertNotEqual(m, move.Move((7, 7), move.Move.ACROSS, "CAT", 0b010, 5.0))
+		self.assertNotEqual(m, move.Move((7, 7), move.Move.DOWN, "CAT", 0b001, 5.0))
+		self.assertEqual(len(set([m, move.Move((7, 7), move.Move.ACROSS, "CAT", 0b001, 5.0)])), 1)
+
+	def testImmutable(self):
+		m = move.Move((7, 7), move.Move.ACROSS, "CAT", 0, 5.0)
+		self.assertRaises(AttributeError, setattr, m, 'score', 6.0)
+
+	def testPickles(self):
+		m = move.Move((2, 9), move.Move.DOWN, "JINX", 0b1000, 26.0)
+		self.assertEqual(pickle.loads(pickle.dumps(m, pickle.HIGHEST_PROTOCOL)), m)
+
+	def testSquares(self):
+		m = move.Move((4, 2), move.Move.DOWN, "DOG", 0b100, 4.0)
+		self.assertEqual(m.squares(), [((4, 2), 'D', False), ((4, 3), 'O', False), ((4, 4), 'G', True)])
+
+	def testPlacementRoundTrip(self):
+		theBoard = SquaresBoard()
+		theBoard.put((8, 7), 'A')
+		tray = [TrayTile('C'), TrayTile(' ', True), TrayTile('E'), TrayTile('S')]
+		tilesPlaced = [((7, 7), tray[0]), ((9, 7), tray[1])]
+		m = move.Move.fromPlacement(theBoard, tilesPlaced, ['T'], 4.0)
+		self.assertEqual(m, move.Move((7, 7), move.Move.ACROSS, "CAT", 0b100, 4.0))
+
+		(placed, blanks) = move.Move.decode(m.encode()).placement(theBoard, tray)
+		self.assertEqual(placed, tilesPlaced)
+		self.assertEqual(blanks, ['T'])
+
+		self.assertEqual(m.placement(theBoard, [TrayTile('C'), TrayTile('T')]), None)	#no blank for the T
+		theBoard.put((8, 7), 'O')
+		self.assertEqual(m.placement(theBoard, tray), None)
+
+if __name__ == '__main__':
+	unittest.main()
@@ -15,7 +15,7 @@ class WordFrequency:
 		
 		self.count = {}
 		self.load()
-		self.dict = dictionarywords.DictionaryWords(WordFrequency.DICTIONARY)
+		self.dict = dictionarywords.DictionaryWords.shared(WordFrequency.DICTIONARY)
 		
 	def load(self):
 		try:
@@ -236,7 +236,7 @@ class WordFrequency:
 		print ""			
 		
 	def printFreq(self, i, w, count):
-		difficulty = int(((10-math.log(self.dict.words[w]))/6.5)*10.0)
+		difficulty = int(((10-math.log(self.dict.usage(w)))/6.5)*10.0)
 		print str(i) + ")\t" + w + "\t\tused "+str(count)+" times. At difficulty level: "+str(difficulty)			
 			
 